@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+
+DAY = np.timedelta64(1, "D")
+
+
+def align_daily(series, start=None, end=None):
+    # Aligns N date-indexed series onto one daily grid, by default the range all
+    # of them cover, filling the days in between observations by linear
+    # interpolation. Returns the grid and a C-contiguous (N, days) float array.
+    days = [s.dropna().index.to_numpy().astype("datetime64[D]") for s in series]
+    values = [s.dropna().to_numpy(dtype="float64") for s in series]
+    if any(len(d) == 0 for d in days):
+        raise ValueError("every series needs at least one value to align")
+    start = np.datetime64(pd.Timestamp(start), "D") if start is not None else max(d.min() for d in days)
+    end = np.datetime64(pd.Timestamp(end), "D") if end is not None else min(d.max() for d in days)
+    if end < start:
+        raise ValueError(f"series do not overlap: {start} > {end}")
+    grid = np.arange(start, end + DAY, DAY)
+
+    # One np.interp call for all series: each series and its copy of the grid
+    # are shifted by their own offset so the blocks never overlap.
+    origin = min(start, min(d.min() for d in days))
+    width = (max(end, max(d.max() for d in days)) - origin) // DAY + 2
+    offsets = np.arange(len(series)) * width
+    xp = np.concatenate([(d - origin) // DAY + off for d, off in zip(days, offsets)]).astype("float64")
+    fp = np.concatenate(values)
+    order = np.argsort(xp, kind="stable")
+    x = ((grid - origin) // DAY + offsets[:, None]).astype("float64")
+    aligned = np.interp(x.ravel(), xp[order], fp[order], left=np.nan, right=np.nan).reshape(x.shape)
+
+    # Days past the last observation keep its value, as Series.interpolate() does;
+    # days before the first one stay missing.
+    for k, d in enumerate(days):
+        aligned[k, grid < d.min()] = np.nan
+        aligned[k, grid > d.max()] = values[k][np.argmax(d)]
+    return pd.DatetimeIndex(grid.astype("datetime64[ns]")), np.ascontiguousarray(aligned)
+
+
+def month_start_indices(dates):
+    months = pd.date_range(dates[0], dates[-1], freq="MS").to_numpy()
+    return np.searchsorted(dates.to_numpy(), months)
+
+
+def peak_index(dates, values, start, end):
+    # Position of the maximum of `values` between two dates (inclusive).
+    grid = dates.to_numpy()
+    lo = np.searchsorted(grid, pd.Timestamp(start).to_datetime64(), side="left")
+    hi = np.searchsorted(grid, pd.Timestamp(end).to_datetime64(), side="right")
+    if hi <= lo:
+        raise ValueError(f"no values between {start} and {end}")
+    return int(lo + np.nanargmax(values[lo:hi]))
+
+
+def highlight_frames(month_indices, peak_indices, interval, pause):
+    # Animation frames at every month start plus the peaks; a peak frame is held
+    # `pause` intervals longer.
+    # An empty list of peaks would otherwise turn the union into floats.
+    peak_indices = np.asarray(peak_indices, dtype="int64")
+    frames = np.union1d(np.asarray(month_indices, dtype="int64"), peak_indices)
+    durations = np.where(np.isin(frames, peak_indices), interval * (1 + pause), interval)
+    return frames.tolist(), durations.tolist()
@@ -0,0 +1,132 @@
+import io
+import multiprocessing
+import os
+import shutil
+import subprocess
+import tempfile
+
+import numpy as np
+from PIL import Image
+
+# Set in the parent right before the pool is forked, so workers inherit the fully
+# set up figure and update function without pickling them.
+_job = None
+
+TRANSPARENT_INDEX = 255
+
+
+def render_frame(fig, update, i, dpi):
+    update(i)
+    buf = io.BytesIO()
+    fig.savefig(buf, format="png", dpi=dpi)
+    return buf.getvalue()
+
+
+def render_chunk(frames):
+    fig, update, dpi = _job
+    return [render_frame(fig, update, i, dpi) for i in frames]
+
+
+def render_frames(fig, update, n_frames, dpi, workers=None):
+    global _job
+    workers = min(workers or os.cpu_count() or 1, n_frames)
+    if workers <= 1 or "fork" not in multiprocessing.get_all_start_methods():
+        return [render_frame(fig, update, i, dpi) for i in range(n_frames)]
+
+    # Contiguous chunks, each rendered in a freshly forked worker
+    # (maxtasksperchild=1): update functions that only ever switch artists on as
+    # time advances see the frames of a chunk in order, starting from the
+    # figure's initial state.
+    chunks = [chunk.tolist() for chunk in np.array_split(np.arange(n_frames), workers * 4) if len(chunk)]
+    _job = (fig, update, dpi)
+    try:
+        with multiprocessing.get_context("fork").Pool(workers, maxtasksperchild=1) as pool:
+            rendered = pool.map(render_chunk, chunks, chunksize=1)
+    finally:
+        _job = None
+    return [png for chunk in rendered for png in chunk]
+
+
+def global_palette(images, colors=255, samples=16):
+    # One palette for the whole animation, built from a montage of evenly spaced
+    # frames. The last palette index is left free for transparency.
+    step = max(1, len(images) // samples)
+    sample = images[::step]
+    width, height = sample[0].size
+    montage = Image.new("RGB", (width, height * len(sample)))
+    for k, image in enumerate(sample):
+        montage.paste(image, (0, height * k))
+    return montage.quantize(colors, method=Image.Quantize.MAXCOVERAGE, dither=Image.Dither.NONE)
+
+
+def delta_frames(images, palette):
+    # Quantize every frame to the shared palette and make the pixels that did not
+    # change since the previous frame transparent; Pillow then crops each frame
+    # to the bounding box of what is left.
+    transparent = TRANSPARENT_INDEX
+    frames, previous = [], None
+    for image in images:
+        indices = np.asarray(image.quantize(palette=palette, dither=Image.Dither.NONE))
+        frame = indices.copy()
+        if previous is not None:
+            frame[indices == previous] = transparent
+        previous = indices
+        out = Image.fromarray(frame, mode="P")
+        out.putpalette(palette.getpalette())
+        frames.append(out)
+    return frames
+
+
+def write_gif(images, path, duration):
+    palette = global_palette(images)
+    frames = delta_frames(images, palette)
+    frames[0].save(path, save_all=True, append_images=frames[1:], duration=duration, loop=0,
+                   transparency=TRANSPARENT_INDEX, disposal=1, optimize=False)
+
+
+def write_webp(images, path, duration):
+    images[0].save(path, save_all=True, append_images=images[1:], duration=duration, loop=0,
+                   quality=90, method=4)
+
+
+def write_mp4(images, path, duration):
+    ffmpeg = shutil.which("ffmpeg")
+    if ffmpeg is None:
+        raise RuntimeError("writing MP4 requires ffmpeg on PATH")
+    durations = duration if isinstance(duration, list) else [duration] * len(images)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        # The concat demuxer keeps per-frame durations without duplicating frames.
+        lines = []
+        for k, (image, ms) in enumerate(zip(images, durations)):
+            name = f"frame{k:05d}.png"
+            image.save(os.path.join(tmp_dir, name))
+            lines += [f"file '{name}'", f"duration {ms / 1000}"]
+        lines.append(f"file 'frame{len(images) - 1:05d}.png'")
+        with open(os.path.join(tmp_dir, "frames.txt"), "w") as f:
+            f.write("\n".join(lines) + "\n")
+        subprocess.run([ffmpeg, "-y", "-loglevel", "error", "-f", "concat", "-safe", "0",
+                        "-i", os.path.join(tmp_dir, "frames.txt"),
+                        "-vf", "pad=ceil(iw/2)*2:ceil(ih/2)*2:color=white", "-pix_fmt", "yuv420p",
+                        "-vsync", "vfr", os.path.abspath(path)], check=True)
+
+
+WRITERS = {".gif": write_gif, ".webp": write_webp, ".mp4": write_mp4}
+
+
+def save_gif(fig, update, n_frames, path, dpi=100, interval=200, durations=None, workers=None,
+             also=()):
+    # Same animation as FuncAnimation(...).save(path, writer="pillow"), with the
+    # frames rasterized in parallel and assembled in order. `durations` (ms, one
+    # per frame) replaces the fixed interval, so a pause is one long frame
+    # instead of the same frame rendered many times. `also` lists extra formats
+    # ("webp", "mp4") written next to the GIF from the same rendered frames.
+    if durations is not None and len(durations) != n_frames:
+        raise ValueError(f"expected {n_frames} frame durations, got {len(durations)}")
+    pngs = render_frames(fig, update, n_frames, dpi, workers)
+    images = [Image.open(io.BytesIO(png)).convert("RGB") for png in pngs]
+    duration = list(durations) if durations is not None else interval
+
+    base, ext = os.path.splitext(path)
+    for target in [path] + [f"{base}.{fmt.lstrip('.')}" for fmt in also]:
+        WRITERS[os.path.splitext(target)[1].lower()](images, target, duration)
+        print(f"{target}: {os.path.getsize(target) / 1e6:.2f} MB")
@@ -0,0 +1,138 @@
+import argparse
+import os
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+from statsmodels.tools.sm_exceptions import ConvergenceWarning
+
+import baselines
+from datasets import load
+from model_selection import NO_SEASON, fit_cached, fit_kwargs, select_order
+
+ARIMA_ORDERS = [(p, 1, q) for p in range(6) for q in range(6)]
+SARIMA_ORDERS = [((p, 1, q), (P, 0, Q, 26))
+                 for p in (1, 2, 5) for q in (1, 2, 5)
+                 for P, Q in ((1, 0), (0, 1), (1, 1))]
+
+
+def weekly_series(entity="United States"):
+    df = load("weekly-confirmed-covid-19-cases-per-million-people", entities=entity)
+    return df.set_index("Day")["Weekly cases per million people"].resample("W").mean()
+
+
+def rolling_origin(series, model, order, seasonal_order=NO_SEASON, first_origin=None,
+                   horizon=4, step=1, refit_every=1, maxiter=50):
+    # Moves the forecast origin forward `step` weeks at a time. New observations
+    # are appended to the state space model; every `refit_every` origins the
+    # parameters are re-estimated starting from the previous origin's values,
+    # otherwise the previous parameters are kept and only the filter is run.
+    first_origin = first_origin or len(series) - 52
+    results = fit_cached(series.iloc[:first_origin], order, seasonal_order, model=model)
+    rows = []
+    origins = range(first_origin, len(series) - horizon + 1, step)
+    for k, origin in enumerate(origins):
+        forecast = results.get_forecast(steps=horizon)
+        mean = forecast.predicted_mean.to_numpy()
+        ci = forecast.conf_int(alpha=0.05).to_numpy()
+        actual = series.iloc[origin:origin + horizon].to_numpy()
+        for h in range(horizon):
+            rows.append({
+                "origin": series.index[origin - 1],
+                "horizon": h + 1,
+                "actual": actual[h],
+                "forecast": mean[h],
+                "lower": ci[h, 0],
+                "upper": ci[h, 1],
+            })
+
+        if k == len(origins) - 1:
+            break
+        new_obs = series.iloc[origin:origin + step]
+        refit = (k + 1) % refit_every == 0
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", ConvergenceWarning)
+            results = results.append(new_obs, refit=refit,
+                                     fit_kwargs=fit_kwargs(model, maxiter) if refit else None)
+    return pd.DataFrame(rows)
+
+
+def rolling_origin_baseline(series, model, first_origin=None, horizon=4, step=1, **kwargs):
+    # Baselines are cheap enough to refit at every origin. Every origin sees a
+    # trailing window of the same length, so all origins are forecast in one
+    # call on a 2-D array of windows.
+    first_origin = first_origin or len(series) - 52
+    values = series.to_numpy(dtype="float64")
+    origins = np.arange(first_origin, len(series) - horizon + 1, step)
+    windows = np.lib.stride_tricks.sliding_window_view(values, first_origin)[origins - first_origin]
+    mean, lower, upper = baselines.BASELINES[model](windows, horizon, 0.05, **kwargs)
+    actual = values[origins[:, None] + np.arange(horizon)]
+    return pd.DataFrame({
+        "origin": np.repeat(series.index[origins - 1], horizon),
+        "horizon": np.tile(np.arange(1, horizon + 1), len(origins)),
+        "actual": actual.ravel(),
+        "forecast": mean.ravel(),
+        "lower": lower.ravel(),
+        "upper": upper.ravel(),
+    })
+
+
+def score(backtest):
+    err = backtest["forecast"] - backtest["actual"]
+    nonzero = backtest["actual"] != 0
+    covered = (backtest["actual"] >= backtest["lower"]) & (backtest["actual"] <= backtest["upper"])
+    frame = pd.DataFrame({
+        "horizon": backtest["horizon"],
+        "abs_err": err.abs(),
+        "ape": (err.abs() / backtest["actual"].abs()).where(nonzero),
+        "covered": covered,
+    })
+    summary = frame.groupby("horizon").agg(
+        mae=("abs_err", "mean"), mape=("ape", "mean"), coverage_95=("covered", "mean"))
+    summary.loc["all"] = [frame["abs_err"].mean(), frame["ape"].mean(), frame["covered"].mean()]
+    summary["mape"] *= 100
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rolling-origin backtest of the weekly new cases forecasts.")
+    parser.add_argument("--model", choices=["arima", "sarima", *baselines.BASELINES], nargs="+",
+                        default=["arima", "sarima"])
+    parser.add_argument("--entity", default="United States")
+    parser.add_argument("--weeks", type=int, default=52, help="number of weeks covered by forecast origins")
+    parser.add_argument("--horizon", type=int, default=4, help="forecast horizon in weeks")
+    parser.add_argument("--refit-every", type=int, default=4,
+                        help="re-estimate parameters every N origins (warm-started); "
+                             "in between only the Kalman filter is updated")
+    parser.add_argument("--out", default="../reports", help="directory for the per-origin CSV files")
+    args = parser.parse_args()
+
+    series = weekly_series(args.entity)
+    first_origin = len(series) - args.weeks
+    train = series.iloc[:first_origin]
+    for model in args.model:
+        if model in baselines.BASELINES:
+            start = time.perf_counter()
+            backtest = rolling_origin_baseline(series, model, first_origin=first_origin, horizon=args.horizon)
+            elapsed = time.perf_counter() - start
+            label = model
+        else:
+            candidates = ARIMA_ORDERS if model == "arima" else SARIMA_ORDERS
+            best = select_order(train, candidates, model=model)
+            start = time.perf_counter()
+            backtest = rolling_origin(series, model, best["order"], best["seasonal_order"],
+                                      first_origin=first_origin, horizon=args.horizon,
+                                      refit_every=args.refit_every)
+            elapsed = time.perf_counter() - start
+            label = f"{model.upper()} {tuple(best['order'])}x{tuple(best['seasonal_order'])}"
+
+        os.makedirs(args.out, exist_ok=True)
+        path = os.path.join(args.out, f"backtest_{model}.csv")
+        backtest.to_csv(path, index=False)
+        print(f"\n{label}: {backtest['origin'].nunique()} origins in {elapsed:.1f}s -> {path}")
+        print(score(backtest).round(3).to_string())
+
+
+if __name__ == "__main__":
+    main()
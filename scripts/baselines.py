@@ -0,0 +1,148 @@
+import numpy as np
+import pandas as pd
+from scipy.stats import norm
+
+# Baseline forecasters working on a 2-D array of series (one row per series, all
+# of the same length), so many series are forecast with a handful of array
+# operations. Each returns (mean, lower, upper) arrays of shape (n_series, steps).
+
+HW_ALPHAS = np.array([0.1, 0.2, 0.3, 0.5, 0.7, 0.9])
+HW_BETAS = np.array([0.0, 0.02, 0.05, 0.1, 0.2])
+HW_GAMMAS = np.array([0.0, 0.05, 0.1, 0.3])
+
+
+def as_2d(values):
+    values = np.asarray(values, dtype="float64")
+    if values.ndim == 1:
+        values = values[None, :]
+    if not np.all(np.isfinite(values)):
+        raise ValueError("baseline forecasts need complete series without NaN")
+    return values
+
+
+def seasonal_naive(values, steps, alpha=0.05, season=26):
+    # Repeats the last observed season; season=1 is the plain naive forecast.
+    y = as_2d(values)
+    if y.shape[1] <= season:
+        raise ValueError(f"seasonal naive needs more than {season} observations")
+    j = np.arange(steps)
+    mean = y[:, y.shape[1] - season + j % season]
+    resid = y[:, season:] - y[:, :-season]
+    sigma = np.sqrt(np.mean(resid ** 2, axis=1, keepdims=True))
+    width = norm.ppf(1 - alpha / 2) * sigma * np.sqrt(j // season + 1)
+    return mean, mean - width, mean + width
+
+
+def holt_winters(values, steps, alpha=0.05, season=26, phi=0.98):
+    # Additive damped-trend Holt-Winters (ETS(A,Ad,A)). The smoothing parameters
+    # are picked per series from a grid by one-step-ahead squared error; every
+    # grid point of every series is filtered at once, one time step at a time.
+    y = as_2d(values)
+    n, T = y.shape
+    m = season if season and season > 1 and T >= 2 * season else 1
+    a, b, g = (p.ravel() for p in np.meshgrid(HW_ALPHAS, HW_BETAS, HW_GAMMAS if m > 1 else [0.0],
+                                              indexing="ij"))
+    keep = (b <= a) & (g <= 1 - a)
+    a, b, g = a[keep], b[keep], g[keep]
+
+    if m > 1:
+        level = np.repeat(y[:, :m].mean(axis=1, keepdims=True), len(a), axis=1)
+        trend = np.repeat((y[:, m:2 * m].mean(axis=1, keepdims=True) - level[:, :1]) / m, len(a), axis=1)
+        seasonal = np.repeat((y[:, :m] - level[:, :1])[:, None, :], len(a), axis=1)
+    else:
+        level = np.repeat(y[:, :1], len(a), axis=1)
+        trend = np.repeat(y[:, 1:2] - y[:, :1], len(a), axis=1) if T > 1 else np.zeros_like(level)
+        seasonal = np.zeros((n, len(a), 1))
+
+    sse = np.zeros_like(level)
+    for t in range(T):
+        s = seasonal[:, :, t % m]
+        err = y[:, t:t + 1] - (level + phi * trend + s)
+        if t >= m:
+            sse += err ** 2
+        level = level + phi * trend + a * err
+        trend = phi * trend + b * err
+        seasonal[:, :, t % m] = s + g * err
+
+    best = np.argmin(sse, axis=1)
+    rows = np.arange(n)
+    level, trend, sse = level[rows, best][:, None], trend[rows, best][:, None], sse[rows, best][:, None]
+    seasonal = seasonal[rows, best]
+    a, b, g = a[best][:, None], b[best][:, None], g[best][:, None]
+
+    h = np.arange(1, steps + 1)
+    damped = np.cumsum(phi ** h)
+    mean = level + damped * trend + seasonal[:, (T + h - 1) % m]
+    # Forecast variance of the additive ETS model: sigma^2 * (1 + sum of c_i^2).
+    i = h[:-1]
+    c = a + b * damped[:-1] + g * (i % m == 0)
+    var_factor = 1 + np.concatenate([np.zeros((n, 1)), np.cumsum(c ** 2, axis=1)], axis=1)
+    sigma2 = sse / max(T - m, 1)
+    width = norm.ppf(1 - alpha / 2) * np.sqrt(sigma2 * var_factor)
+    return mean, mean - width, mean + width
+
+
+def log_linear(values, steps, alpha=0.05, window=8, phi=0.9):
+    # Exponential growth or decay fitted by least squares to log(1 + y) over the
+    # last `window` observations, with closed-form slopes for all series at once.
+    # The slope is damped by phi per step ahead so long horizons level off.
+    y = as_2d(values)
+    window = min(window, y.shape[1])
+    if window < 3:
+        raise ValueError("log-linear growth needs at least 3 observations")
+    z = np.log1p(np.clip(y[:, -window:], 0, None))
+    t = np.arange(window, dtype="float64")
+    t_mean = t.mean()
+    sxx = np.sum((t - t_mean) ** 2)
+    slope = (z - z.mean(axis=1, keepdims=True)) @ (t - t_mean) / sxx
+    intercept = z.mean(axis=1) - slope * t_mean
+    resid = z - (intercept[:, None] + slope[:, None] * t)
+    s = np.sqrt(np.sum(resid ** 2, axis=1, keepdims=True) / (window - 2))
+
+    t_new = window - 1 + np.cumsum(phi ** np.arange(1, steps + 1))
+    log_mean = intercept[:, None] + slope[:, None] * t_new
+    width = norm.ppf(1 - alpha / 2) * s * np.sqrt(1 + 1 / window + (t_new - t_mean) ** 2 / sxx)
+    return np.expm1(log_mean), np.expm1(log_mean - width), np.expm1(log_mean + width)
+
+
+BASELINES = {
+    "naive": lambda values, steps, alpha=0.05: seasonal_naive(values, steps, alpha, season=1),
+    "seasonal_naive": seasonal_naive,
+    "holt_winters": holt_winters,
+    "log_linear": log_linear,
+}
+
+
+def forecast_frame(frame, model, steps, alpha=0.05, **kwargs):
+    # frame: one column per series on a shared weekly index. Returns mean, lower
+    # and upper frames indexed by the forecast dates.
+    mean, lower, upper = BASELINES[model](frame.to_numpy().T, steps, alpha, **kwargs)
+    index = pd.date_range(frame.index[-1], periods=steps + 1, freq=frame.index.freq or pd.infer_freq(frame.index))[1:]
+    return tuple(pd.DataFrame(arr.T, index=index, columns=frame.columns) for arr in (mean, lower, upper))
+
+
+class BaselineForecast:
+    def __init__(self, series, model, steps, kwargs):
+        self.series, self.model, self.steps, self.kwargs = series, model, steps, kwargs
+        mean, _, _ = forecast_frame(series.to_frame(), model, steps, **kwargs)
+        self.predicted_mean = mean.iloc[:, 0].rename("predicted_mean")
+
+    def conf_int(self, alpha=0.05):
+        _, lower, upper = forecast_frame(self.series.to_frame(), self.model, self.steps, alpha, **self.kwargs)
+        return pd.DataFrame({"lower": lower.iloc[:, 0], "upper": upper.iloc[:, 0]})
+
+
+class BaselineResults:
+    # Mirrors the part of the statsmodels results API the forecast scripts use:
+    # fit(...).get_forecast(steps) -> .predicted_mean and .conf_int(alpha).
+    def __init__(self, series, model, kwargs):
+        self.series, self.model, self.kwargs = series, model, kwargs
+
+    def get_forecast(self, steps):
+        return BaselineForecast(self.series, self.model, steps, self.kwargs)
+
+
+def fit(series, model="holt_winters", **kwargs):
+    if model not in BASELINES:
+        raise KeyError(f"unknown baseline {model!r}, expected one of: {', '.join(BASELINES)}")
+    return BaselineResults(series, model, kwargs)
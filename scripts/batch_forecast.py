@@ -0,0 +1,219 @@
+import argparse
+import concurrent.futures
+import multiprocessing
+import os
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from datasets import HAVE_PYARROW, load
+from model_selection import fit_cached
+from state_metrics import load_state_metrics, weekly_totals
+
+if HAVE_PYARROW:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+# Each source yields one weekly series per entity. "metric" sources are weekly
+# totals of a daily column of the derived state metrics (see state_metrics.py).
+SOURCES = {
+    "cases": {"dataset": "weekly-confirmed-covid-19-cases-per-million-people",
+              "entity": "Entity", "date": "Day", "value": "Weekly cases per million people"},
+    "deaths": {"dataset": "weekly-confirmed-covid-19-deaths-per-million-people",
+               "entity": "Entity", "date": "Day", "value": "Weekly deaths per million people"},
+    "admissions": {"dataset": "weekly-hospital-admissions-covid",
+                   "entity": "Entity", "date": "Day", "value": "Weekly new hospital admissions"},
+    "state_cases": {"metric": "new_cases"},
+    "state_deaths": {"metric": "new_deaths"},
+}
+
+ORDER = (4, 1, 4)
+FALLBACK_ORDERS = [(2, 1, 2), (1, 1, 0)]
+MIN_WEEKS = 52
+
+if HAVE_PYARROW:
+    SCHEMA = pa.schema([
+        ("source", pa.dictionary(pa.int8(), pa.string())),
+        ("entity", pa.dictionary(pa.int32(), pa.string())),
+        ("order", pa.dictionary(pa.int8(), pa.string())),
+        ("date", pa.timestamp("ns")),
+        ("step", pa.int16()),
+        ("forecast", pa.float64()),
+        ("lower", pa.float64()),
+        ("upper", pa.float64()),
+    ])
+
+
+def keep_series(series, entity, weekly):
+    weekly = weekly.loc[weekly.first_valid_index():weekly.last_valid_index()]
+    if len(weekly) >= MIN_WEEKS and weekly.nunique() > 1:
+        series[str(entity)] = weekly.astype("float64")
+
+
+def source_series(name, entities=None):
+    spec = SOURCES[name]
+    series = {}
+    if "metric" in spec:
+        metrics = load_state_metrics(columns=["date", "state", spec["metric"]], states=entities)
+        weekly = weekly_totals(metrics, spec["metric"])
+        # Forecasts continue from the last week, which must not be a partial one.
+        if len(weekly) and weekly.index[-1] > metrics["date"].max():
+            raise RuntimeError(f"{name}: the week ending {weekly.index[-1]:%Y-%m-%d} is past the last "
+                               f"day of data ({metrics['date'].max():%Y-%m-%d})")
+        for entity, values in weekly.items():
+            keep_series(series, entity, values)
+        return series
+
+    df = load(spec["dataset"], columns=[spec["entity"], spec["date"], spec["value"]], entities=entities)
+    # One read and one groupby per dataset instead of one load per entity.
+    for entity, group in df.groupby(spec["entity"], observed=True, sort=True):
+        values = group.set_index(spec["date"])[spec["value"]].sort_index()
+        keep_series(series, entity, values.resample("W").mean().interpolate(limit_area="inside"))
+    return series
+
+
+def forecast_series(task):
+    source, entity, series, horizon, orders = task
+    failures = []
+    for order in orders:
+        try:
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore")
+                forecast = fit_cached(series, order, model="arima", converged=True).get_forecast(steps=horizon)
+                mean = forecast.predicted_mean.to_numpy()
+                ci = forecast.conf_int(alpha=0.05).to_numpy()
+        except (RuntimeError, np.linalg.LinAlgError, ValueError) as e:
+            failures.append(f"{order}: {e}")
+            continue
+        if not np.all(np.isfinite(mean)):
+            failures.append(f"{order}: non-finite forecast")
+            continue
+        return {
+            "source": source,
+            "entity": entity,
+            "order": order,
+            "fallback": order != orders[0],
+            "dates": forecast.predicted_mean.index.to_numpy(),
+            "forecast": mean,
+            "lower": ci[:, 0],
+            "upper": ci[:, 1],
+        }
+    return {"source": source, "entity": entity, "order": None, "failures": failures}
+
+
+def to_frame(results):
+    frames = []
+    for r in results:
+        n = len(r["forecast"])
+        frames.append(pd.DataFrame({
+            "source": r["source"],
+            "entity": r["entity"],
+            "order": "_".join(map(str, r["order"])),
+            "date": r["dates"],
+            "step": np.arange(1, n + 1, dtype="int16"),
+            "forecast": r["forecast"],
+            "lower": r["lower"],
+            "upper": r["upper"],
+        }))
+    return pd.concat(frames, ignore_index=True)
+
+
+def open_output(path):
+    # Results are appended as they arrive, so memory stays flat however many
+    # series are forecast. Without pyarrow the same rows go to a CSV file.
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = path + ".tmp"
+    if HAVE_PYARROW and path.endswith(".parquet"):
+        writer = pq.ParquetWriter(tmp_path, SCHEMA)
+        write = lambda df: writer.write_table(pa.Table.from_pandas(df, schema=SCHEMA, preserve_index=False))
+        close = writer.close
+    else:
+        f = open(tmp_path, "w", encoding="utf-8", newline="")
+        write = lambda df: df.to_csv(f, index=False, header=f.tell() == 0)
+        close = f.close
+
+    def finish(ok):
+        # A failed run leaves the previous output in place.
+        close()
+        if ok:
+            os.replace(tmp_path, path)
+        else:
+            os.remove(tmp_path)
+    return write, finish
+
+
+def forecasts(tasks, workers):
+    # Results in completion order; forked workers like model_selection.select_order,
+    # in this process where fork is not available.
+    if workers == 1 or "fork" not in multiprocessing.get_all_start_methods():
+        yield from map(forecast_series, tasks)
+        return
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers,
+                                                mp_context=multiprocessing.get_context("fork")) as pool:
+        futures = [pool.submit(forecast_series, task) for task in tasks]
+        for future in concurrent.futures.as_completed(futures):
+            yield future.result()
+
+
+def run(sources, horizon, out, workers=None, entities=None, flush_every=32):
+    orders = [ORDER] + [o for o in FALLBACK_ORDERS if o != ORDER]
+    tasks = [(source, entity, series, horizon, orders)
+             for source in sources
+             for entity, series in source_series(source, entities).items()]
+    if not tasks:
+        raise RuntimeError("no series long enough to forecast")
+    print(f"{len(tasks)} series from {', '.join(sources)}")
+
+    write, finish = open_output(out)
+    done, fallbacks, failed, pending = 0, [], [], []
+    start = time.perf_counter()
+    workers = min(workers or os.cpu_count() or 1, len(tasks))
+    # Longest series first, they take the longest to fit.
+    tasks.sort(key=lambda t: -len(t[2]))
+    ok = False
+    try:
+        for result in forecasts(tasks, workers):
+            done += 1
+            if result["order"] is None:
+                failed.append(result)
+                continue
+            if result["fallback"]:
+                fallbacks.append(result)
+            pending.append(result)
+            if len(pending) >= flush_every:
+                write(to_frame(pending))
+                pending = []
+            if done % 50 == 0:
+                print(f"  {done}/{len(tasks)} series, {time.perf_counter() - start:.0f}s")
+        if pending:
+            write(to_frame(pending))
+        ok = True
+    finally:
+        finish(ok)
+
+    print(f"{done - len(failed)} forecasts in {time.perf_counter() - start:.1f}s -> {out}")
+    for r in fallbacks:
+        print(f"  fallback {r['order']}: {r['source']}/{r['entity']}")
+    for r in failed:
+        print(f"  failed: {r['source']}/{r['entity']} ({'; '.join(r['failures'])})")
+    return done - len(failed), failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Forecast weekly series for every entity of the selected sources.")
+    parser.add_argument("sources", nargs="*", help=f"any of {', '.join(sorted(SOURCES))} (default: all)")
+    parser.add_argument("--entity", action="append", dest="entities", help="only forecast these entities")
+    parser.add_argument("--horizon", type=int, default=12, help="forecast horizon in weeks")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="worker processes (default: all CPUs)")
+    parser.add_argument("--out", default="../reports/forecasts.parquet" if HAVE_PYARROW else "../reports/forecasts.csv")
+    args = parser.parse_args()
+    unknown = set(args.sources) - set(SOURCES)
+    if unknown:
+        parser.error(f"unknown sources: {', '.join(sorted(unknown))}")
+    run(args.sources or sorted(SOURCES), args.horizon, args.out, workers=args.jobs, entities=args.entities)
+
+
+if __name__ == "__main__":
+    main()
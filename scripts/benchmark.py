@@ -0,0 +1,345 @@
+import argparse
+import builtins
+import datetime
+import functools
+import json
+import os
+import platform
+import resource
+import runpy
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from build import DATA_DIR, JOBS, ROOT_DIR, SCRIPTS_DIR
+
+BASELINE_PATH = os.path.join(ROOT_DIR, "benchmarks", "baseline.json")
+REPORT_PATH = os.path.join(ROOT_DIR, "reports", "benchmark.json")
+SCALES = [1, 10, 100]
+STAGES = ["import", "load", "transform", "rasterize", "encode", "serialize"]
+
+# The plot scripts are flat module code, so their stages are timed by wrapping
+# the shared helpers they go through; whatever runs outside these is "transform".
+# (module, attribute, stage); a dict attribute has each of its values wrapped.
+PATCHES = [
+    ("datasets", "load", "load"),
+    ("state_metrics", "load_state_metrics", "load"),
+    ("pandas", "read_csv", "load"),
+    ("pandas", "read_parquet", "load"),
+    ("animation_export", "render_frames", "rasterize"),
+    ("matplotlib.figure", "Figure.savefig", "rasterize"),
+    ("animation_export", "WRITERS", "encode"),
+    ("html_export", "write_html", "serialize"),
+]
+
+# Lookup tables are joined on, not grown, when the inputs are scaled.
+LOOKUPS = {"states_cords", "colleges_cords"}
+
+# Regressions: slower, bigger or larger than the baseline by more than the
+# tolerance and by more than these absolute amounts, to ignore timer noise.
+MIN_SECONDS = 0.25
+MIN_RSS_MB = 25
+MIN_BYTES = 1024
+
+
+# --- child side: runs one plot script with its stages timed -----------------
+
+stack = ["transform"]
+times = dict.fromkeys(STAGES, 0.0)
+mark = [time.perf_counter()]
+
+
+def switch(stage):
+    now = time.perf_counter()
+    times[stack[-1]] += now - mark[0]
+    mark[0] = now
+    if stage is None:
+        stack.pop()
+    else:
+        stack.append(stage)
+
+
+def timed(stage, func):
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        switch(stage)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            switch(None)
+    return wrapper
+
+
+def patch_loaded(pending):
+    # Wraps the helpers of modules imported so far, before the importing
+    # `from module import name` statement binds them.
+    for entry in list(pending):
+        module_name, attr, stage = entry
+        module = sys.modules.get(module_name)
+        if module is None:
+            continue
+        *path, name = attr.split(".")
+        owner = functools.reduce(lambda obj, part: getattr(obj, part, None), path, module)
+        value = getattr(owner, name, None)
+        if value is None:
+            # Still being initialized.
+            continue
+        if isinstance(value, dict):
+            value.update({key: timed(stage, func) for key, func in value.items()})
+        else:
+            setattr(owner, name, timed(stage, value))
+        pending.remove(entry)
+
+
+def run_child(script, result_path):
+    pending = list(PATCHES)
+    real_import = builtins.__import__
+
+    def traced_import(*args, **kwargs):
+        switch("import")
+        try:
+            module = real_import(*args, **kwargs)
+        finally:
+            switch(None)
+        if pending:
+            patch_loaded(pending)
+        return module
+
+    builtins.__import__ = traced_import
+    status = 0
+    start = time.perf_counter()
+    mark[0] = start
+    sys.argv = [script]
+    try:
+        runpy.run_path(script, run_name="__main__")
+    except SystemExit as e:
+        status = e.code if isinstance(e.code, int) else 1
+    finally:
+        builtins.__import__ = real_import
+    switch("transform")
+    total = time.perf_counter() - start
+    # ru_maxrss is in KiB on Linux; the children are the frame render workers.
+    peak_kb = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+                  resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    with open(result_path, "w", encoding="utf-8") as f:
+        json.dump({"status": status, "seconds": total, "stages": times, "peak_rss_mb": peak_kb / 1024}, f)
+    sys.exit(status)
+
+
+# --- parent side: data trees, runs, reports ---------------------------------
+
+def scale_csv(name, src, dst, factor):
+    # Grows a CSV `factor` times: entity datasets get renamed copies of every
+    # entity ("Texas (2)", ...), monthly BLS tables get copies of every series
+    # column, anything else its rows repeated.
+    import numpy as np
+    import pandas as pd
+
+    import datasets
+
+    spec = datasets.DATASETS.get(name, {})
+    skiprows = spec.get("read_csv", {}).get("skiprows", 0)
+    with open(src, encoding="utf-8") as f:
+        preamble = [f.readline() for _ in range(skiprows)]
+    df = pd.read_csv(src, dtype=str, keep_default_na=False, skiprows=skiprows)
+    entity = spec.get("entity") or (spec.get("states") or [None])[0]
+    if entity:
+        named = df[entity] != ""
+        copies = [df.assign(**{entity: np.where(named, df[entity] + f" ({k})", "")}) for k in range(2, factor + 1)]
+        df = pd.concat([df, *copies], ignore_index=True)
+    elif spec.get("dates"):
+        date, values = df.columns[0], df.columns[1:]
+        df = pd.concat([df, *[df[values].add_suffix(f" ({k})") for k in range(2, factor + 1)]], axis=1)
+        df = df[[date, *df.columns.drop(date)]]
+    else:
+        df = pd.concat([df] * factor, ignore_index=True)
+    with open(dst, "w", encoding="utf-8", newline="") as f:
+        f.writelines(preamble)
+        df.to_csv(f, index=False)
+
+
+def make_tree(root, scale, inputs):
+    # A copy of the scripts next to their own data/ and plots/, so runs never
+    # touch the repo's caches or plots. Unscaled inputs are symlinked.
+    scripts_dir, data_dir = os.path.join(root, "scripts"), os.path.join(root, "data")
+    for path in (scripts_dir, data_dir, os.path.join(root, "plots")):
+        os.makedirs(path)
+    for entry in os.listdir(SCRIPTS_DIR):
+        if entry.endswith(".py"):
+            shutil.copy2(os.path.join(SCRIPTS_DIR, entry), scripts_dir)
+    for entry in sorted(os.listdir(DATA_DIR)):
+        src, name = os.path.join(DATA_DIR, entry), entry[:-len(".csv")]
+        if not entry.endswith(".csv"):
+            continue
+        if scale > 1 and entry in inputs and name not in LOOKUPS:
+            scale_csv(name, src, os.path.join(data_dir, entry), scale)
+        else:
+            os.symlink(src, os.path.join(data_dir, entry))
+    return scripts_dir
+
+
+def run_once(scripts_dir, script):
+    result_path = os.path.join(os.path.dirname(scripts_dir), "result.json")
+    if os.path.exists(result_path):
+        os.remove(result_path)
+    env = {**os.environ, "MPLBACKEND": "Agg"}
+    start = time.perf_counter()
+    proc = subprocess.run([sys.executable, "benchmark.py", "--child", script, result_path], cwd=scripts_dir,
+                          env=env, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+    wall = time.perf_counter() - start
+    if proc.returncode != 0 or not os.path.exists(result_path):
+        return {"status": f"exit {proc.returncode}", "wall_seconds": wall, "output": proc.stdout[-2000:]}
+    with open(result_path, encoding="utf-8") as f:
+        child = json.load(f)
+    plots_dir = os.path.join(os.path.dirname(scripts_dir), "plots")
+    return {
+        "status": "ok",
+        "wall_seconds": wall,
+        "seconds": child["seconds"],
+        "stages": child["stages"],
+        "peak_rss_mb": child["peak_rss_mb"],
+        "output_bytes": sum(os.path.getsize(os.path.join(plots_dir, name)) for name in JOBS[script]["outputs"]),
+    }
+
+
+def run_benchmarks(scripts, scales, repeat, workdir):
+    # Per script and scale one cold run, with empty caches, then `repeat` warm
+    # runs of which the fastest is kept. Runs are sequential so they do not
+    # compete for CPU or memory.
+    results = []
+    inputs = {name for script in scripts for name in JOBS[script]["inputs"]}
+    for scale in scales:
+        print(f"preparing {scale}x data")
+        root = os.path.join(workdir, f"x{scale}")
+        scripts_dir = make_tree(root, scale, inputs)
+        for script in scripts:
+            runs = {"cold": run_once(scripts_dir, script)}
+            warm = [run_once(scripts_dir, script) for _ in range(repeat)] if runs["cold"]["status"] == "ok" else []
+            if warm:
+                runs["warm"] = min(warm, key=lambda r: (r["status"] != "ok", r["wall_seconds"]))
+            for run, result in runs.items():
+                results.append({"script": script, "scale": scale, "run": run, **result})
+                print_row(results[-1])
+    return results
+
+
+def print_header():
+    stages = " ".join(f"{stage:>9}" for stage in STAGES)
+    print(f"{'script':<36} {'scale':>5} {'run':<4} {'seconds':>8} {stages} {'rss MB':>7} {'out KB':>8}")
+
+
+def print_row(result):
+    head = f"{result['script']:<36} {str(result['scale']) + 'x':>5} {result['run']:<4}"
+    if result["status"] != "ok":
+        print(f"{head} {result['status']}")
+        print(result["output"].rstrip())
+        return
+    stages = " ".join(f"{result['stages'][stage]:>9.2f}" for stage in STAGES)
+    print(f"{head} {result['seconds']:>8.2f} {stages} {result['peak_rss_mb']:>7.0f} "
+          f"{result['output_bytes'] / 1024:>8.0f}")
+
+
+def metrics(result):
+    values = {"seconds": (result["seconds"], MIN_SECONDS), "peak_rss_mb": (result["peak_rss_mb"], MIN_RSS_MB),
+              "output_bytes": (result["output_bytes"], MIN_BYTES)}
+    for stage in STAGES:
+        values[f"{stage} seconds"] = (result["stages"][stage], MIN_SECONDS)
+    return values
+
+
+def compare(results, baseline, tolerance):
+    # Every metric of every (script, scale, run) also in the baseline, flagged
+    # when above it by more than `tolerance` relative and the absolute floor.
+    previous = {(r["script"], r["scale"], r["run"]): r for r in baseline["results"] if r["status"] == "ok"}
+    regressions = []
+    for result in results:
+        key = (result["script"], result["scale"], result["run"])
+        if result["status"] != "ok" or key not in previous:
+            continue
+        before = metrics(previous[key])
+        for metric, (value, floor) in metrics(result).items():
+            old = before[metric][0]
+            if value > old * (1 + tolerance) and value - old > floor:
+                regressions.append((*key, metric, old, value))
+    return regressions
+
+
+def write_json(path, report):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def main():
+    if sys.argv[1:2] == ["--child"]:
+        run_child(*sys.argv[2:4])
+
+    parser = argparse.ArgumentParser(description="Time the load, transform and render stages of the plot scripts "
+                                                 "on the bundled data and on inputs scaled up.")
+    parser.add_argument("scripts", nargs="*", help="scripts to benchmark (default: all with their inputs present)")
+    parser.add_argument("--scale", type=int, nargs="+", default=SCALES, help="input scale factors")
+    parser.add_argument("--repeat", type=int, default=1, help="warm runs per script and scale, the fastest is kept")
+    parser.add_argument("--out", default=REPORT_PATH, help="where to write the results")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="results to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="store these results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="relative increase over the baseline reported as a regression")
+    parser.add_argument("--keep", action="store_true", help="keep the scratch directory with the data and plots")
+    args = parser.parse_args()
+
+    unknown = [s for s in args.scripts if s not in JOBS]
+    if unknown:
+        parser.error(f"unknown script(s): {', '.join(unknown)}")
+    scripts = []
+    for script in args.scripts or sorted(JOBS):
+        missing = [name for name in JOBS[script]["inputs"] if not os.path.exists(os.path.join(DATA_DIR, name))]
+        if missing:
+            print(f"skip     {script} (missing input: {', '.join(missing)})")
+            continue
+        scripts.append(script)
+
+    workdir = tempfile.mkdtemp(prefix="benchmark-")
+    try:
+        print_header()
+        results = run_benchmarks(scripts, args.scale, args.repeat, workdir)
+    finally:
+        if args.keep:
+            print(f"scratch files kept in {workdir}")
+        else:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        "created": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "machine": f"{platform.system()} {platform.machine()}, {os.cpu_count()} CPUs",
+        "results": results,
+    }
+    write_json(args.out, report)
+    print(f"\nresults written to {args.out}")
+
+    failed = [r for r in results if r["status"] != "ok"]
+    regressions = []
+    if args.save_baseline:
+        write_json(args.baseline, report)
+        print(f"baseline written to {args.baseline}")
+    elif os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline["machine"] != report["machine"]:
+            print(f"note: baseline was recorded on {baseline['machine']}")
+        regressions = compare(results, baseline, args.tolerance)
+        print(f"{len(regressions)} regression(s) against the baseline of {baseline['created']}")
+        for script, scale, run, metric, old, value in regressions:
+            print(f"  {script} {scale}x {run}: {metric} {old:,.2f} -> {value:,.2f} (+{value / old - 1:.0%})"
+                  if old else f"  {script} {scale}x {run}: {metric} 0 -> {value:,.2f}")
+    else:
+        print(f"no baseline at {args.baseline}, run with --save-baseline to store one")
+    sys.exit(1 if failed or regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+import calendar
+
+import numpy as np
+import pandas as pd
+
+from datasets import load
+
+# BLS exports come in two layouts: one row per series with a "<Month> <year>"
+# column per month (bls_unemployment_rate_per_state), or one row per month with
+# a column per series (bls_unemployment_rate, import/export prices). Either way
+# the readers below hand out the same (series, months) float matrix.
+MONTHS = {name: k for names in (calendar.month_name, calendar.month_abbr) for k, name in enumerate(names) if name}
+
+
+def parse_months(labels):
+    # One parse per header label instead of one per cell; labels that are not
+    # "<Month> <year>" (the label column, trailing empty columns) become NaT.
+    months = np.full(len(labels), np.datetime64("NaT"), dtype="datetime64[M]")
+    for k, label in enumerate(labels):
+        parts = str(label).split()
+        if len(parts) == 2 and parts[0] in MONTHS and parts[1].isdigit():
+            months[k] = np.datetime64(f"{int(parts[1]):04d}-{MONTHS[parts[0]]:02d}")
+    return pd.DatetimeIndex(months.astype("datetime64[ns]"), name="date")
+
+
+def read_matrix(name):
+    # Returns the series labels, the months and a C-contiguous float64 array of
+    # shape (series, months); missing values ("-" in the exports) are NaN.
+    df = load(name)
+    label = df.columns[0]
+    months = parse_months(df.columns)
+    if months.notna().any():
+        values = df.loc[:, months.notna()].to_numpy(dtype="float64")
+        return pd.Index(df[label], name=label), months[months.notna()], np.ascontiguousarray(values)
+    columns = df.columns[1:][df.iloc[:, 1:].notna().any().to_numpy()]
+    values = df[columns].to_numpy(dtype="float64").T
+    return pd.Index(columns, name="series"), pd.DatetimeIndex(df[label], name="date"), np.ascontiguousarray(values)
+
+
+def read_wide(name):
+    # One row per month, one column per series.
+    labels, months, values = read_matrix(name)
+    return pd.DataFrame(values.T, index=months, columns=labels)
+
+
+def read_long(name, value_name="value"):
+    # One row per (series, month), built by repeating the labels and months
+    # rather than melting.
+    labels, months, values = read_matrix(name)
+    return pd.DataFrame({
+        labels.name: labels.repeat(len(months)),
+        "date": np.tile(months.to_numpy(), len(labels)),
+        value_name: values.ravel(),
+    })
@@ -0,0 +1,230 @@
+import argparse
+import ast
+import concurrent.futures
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import time
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(SCRIPTS_DIR)
+DATA_DIR = os.path.join(ROOT_DIR, "data")
+PLOTS_DIR = os.path.join(ROOT_DIR, "plots")
+STATE_PATH = os.path.join(ROOT_DIR, ".build", "state.json")
+
+JOBS = {
+    "confirmed_cases.py": {
+        "inputs": ["weekly-confirmed-covid-19-cases-per-million-people.csv"],
+        "outputs": ["confirmed_cases.html"],
+    },
+    "confirmed_deaths.py": {
+        "inputs": ["weekly-confirmed-covid-19-deaths-per-million-people.csv"],
+        "outputs": ["confirmed_deaths.html"],
+    },
+    "cumulative_number_of_cases.py": {
+        "inputs": ["cumulative-confirmed-covid-19-cases-per-million-people.csv"],
+        "outputs": ["cumulative_number_of_cases.gif"],
+    },
+    "cumulative_number_of_deaths.py": {
+        "inputs": ["cumulative-confirmed-covid-19-deaths-per-million-people.csv"],
+        "outputs": ["cumulative_number_of_deaths.gif"],
+    },
+    "economic_indicators.py": {
+        "inputs": ["bls_unemployment_rate.csv", "bls_import_prices.csv", "bls_export_prices.csv"],
+        "outputs": ["economic_indicators.html"],
+    },
+    "forecast_new_cases_ARIMA.py": {
+        "inputs": ["weekly-confirmed-covid-19-cases-per-million-people.csv"],
+        "outputs": ["usa_covid_weekly_forecast_ARIMA.png"],
+    },
+    "forecast_new_cases_baseline.py": {
+        "inputs": ["weekly-confirmed-covid-19-cases-per-million-people.csv"],
+        "outputs": ["usa_covid_weekly_forecast_baseline.png"],
+    },
+    "forecast_new_cases_SARIMA.py": {
+        "inputs": ["weekly-confirmed-covid-19-cases-per-million-people.csv"],
+        "outputs": ["usa_covid_weekly_forecast_SARIMA.png"],
+    },
+    "hospital_vs_icu.py": {
+        "inputs": ["current-covid-patients-hospital.csv", "current-covid-patients-icu.csv"],
+        "outputs": ["usa_hospital_icu.gif"],
+    },
+    "hospital_vs_new_cases.py": {
+        "inputs": ["weekly-hospital-admissions-covid.csv", "weekly-confirmed-covid-19-cases-per-million-people.csv"],
+        "outputs": ["usa_hospital_vs_new_cases.gif"],
+    },
+    "normalized_deaths_by_state_map.py": {
+        "inputs": ["united_states_covid19_deaths_ed_visits_and_positivity_by_state.csv", "states_cords.csv"],
+        "outputs": ["normalized_deaths_by_state.html"],
+    },
+    "state_vaccinations.py": {
+        "inputs": ["us_state_vaccinations.csv", "states_cords.csv"],
+        "outputs": ["state_vaccination_trends.html"],
+    },
+    "stay_at_home_usa.py": {
+        "inputs": ["states_cords.csv"],
+        "outputs": ["stay_home_orders_usa.html"],
+    },
+    "total_deaths_by_state_map.py": {
+        "inputs": ["us-states.csv", "states_cords.csv"],
+        "outputs": ["total_deaths_by_state_map.html"],
+    },
+    "tracking_colleges.py": {
+        "inputs": ["colleges.csv", "colleges_cords.csv"],
+        "outputs": ["covid_cases_colleges_map.html"],
+    },
+    "unemployment_per_state.py": {
+        "inputs": ["bls_unemployment_rate_per_state.csv", "states_cords.csv"],
+        "outputs": ["unemployment_per_state.html"],
+    },
+    "usa_vaccinations.py": {
+        "inputs": ["us_state_vaccinations.csv", "states_cords.csv"],
+        "outputs": ["usa_vaccinations.png"],
+    },
+}
+
+
+def file_digest(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def local_modules(script, seen=None):
+    # Helper modules living next to the scripts are part of a job's source.
+    seen = set() if seen is None else seen
+    with open(os.path.join(SCRIPTS_DIR, script), encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            names = [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            names = [node.module]
+        else:
+            continue
+        for name in names:
+            module = name.split(".")[0] + ".py"
+            if module not in seen and os.path.exists(os.path.join(SCRIPTS_DIR, module)):
+                seen.add(module)
+                local_modules(module, seen)
+    return seen
+
+
+def job_digest(script, job):
+    h = hashlib.sha256()
+    for source in [script] + sorted(local_modules(script) - {script}):
+        h.update(source.encode())
+        h.update(file_digest(os.path.join(SCRIPTS_DIR, source)).encode())
+    for name in job["inputs"]:
+        h.update(name.encode())
+        h.update(file_digest(os.path.join(DATA_DIR, name)).encode())
+    return h.hexdigest()
+
+
+def load_state():
+    if not os.path.exists(STATE_PATH):
+        return {}
+    with open(STATE_PATH, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_state(state):
+    os.makedirs(os.path.dirname(STATE_PATH), exist_ok=True)
+    tmp_path = STATE_PATH + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, STATE_PATH)
+
+
+def run_script(script):
+    start = time.perf_counter()
+    proc = subprocess.run([sys.executable, script], cwd=SCRIPTS_DIR,
+                          stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+    return proc.returncode, time.perf_counter() - start, proc.stdout
+
+
+def print_summary(results):
+    if not results:
+        return
+    print()
+    print(f"{'script':<36} {'status':<8} {'seconds':>8}  outputs")
+    for script, result in sorted(results.items(), key=lambda item: -item[1]["seconds"]):
+        outputs = ", ".join(JOBS[script]["outputs"])
+        print(f"{script:<36} {result['status']:<8} {result['seconds']:>8.1f}  {outputs}")
+
+
+def build(scripts, force=False, dry_run=False, workers=None):
+    state = load_state()
+    stale = []
+
+    for script in scripts:
+        job = JOBS[script]
+        missing = [name for name in job["inputs"] if not os.path.exists(os.path.join(DATA_DIR, name))]
+        if missing:
+            print(f"skip     {script} (missing input: {', '.join(missing)})")
+            continue
+
+        digest = job_digest(script, job)
+        outputs_exist = all(os.path.exists(os.path.join(PLOTS_DIR, name)) for name in job["outputs"])
+        if not force and outputs_exist and state.get(script, {}).get("digest") == digest:
+            print(f"fresh    {script}")
+            continue
+        print(f"stale    {script}")
+        stale.append((script, digest))
+
+    if dry_run or not stale:
+        return []
+
+    # Longest jobs first, so the slowest animation does not start last.
+    # Jobs that never ran before have no timing yet and are started early too.
+    stale.sort(key=lambda item: -state.get(item[0], {}).get("seconds", float("inf")))
+
+    # Every job already runs in its own interpreter, so the pool only has to
+    # wait on the child processes.
+    workers = workers or os.cpu_count() or 1
+    results = {}
+    wall_start = time.perf_counter()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(run_script, script): (script, digest) for script, digest in stale}
+        for future in concurrent.futures.as_completed(futures):
+            script, digest = futures[future]
+            returncode, elapsed, output = future.result()
+            if returncode != 0:
+                print(f"FAILED   {script} (exit {returncode}, {elapsed:.1f}s)")
+                print(output.rstrip())
+                results[script] = {"status": f"exit {returncode}", "seconds": elapsed}
+                continue
+            state[script] = {"digest": digest, "seconds": round(elapsed, 2)}
+            save_state(state)
+            print(f"done     {script} ({elapsed:.1f}s)")
+            results[script] = {"status": "ok", "seconds": elapsed}
+
+    print_summary(results)
+    print(f"\n{len(results)} job(s) on {workers} worker(s) in {time.perf_counter() - wall_start:.1f}s")
+    return [script for script, result in results.items() if result["status"] != "ok"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild the plots whose data or source changed.")
+    parser.add_argument("scripts", nargs="*", help="scripts to build (default: all)")
+    parser.add_argument("--force", action="store_true", help="rebuild even if up to date")
+    parser.add_argument("--dry-run", action="store_true", help="only report what is stale")
+    parser.add_argument("-j", "--jobs", type=int, default=None,
+                        help="number of plots built in parallel (default: number of CPUs)")
+    args = parser.parse_args()
+
+    unknown = [s for s in args.scripts if s not in JOBS]
+    if unknown:
+        parser.error(f"unknown script(s): {', '.join(unknown)}")
+
+    failed = build(args.scripts or sorted(JOBS), force=args.force, dry_run=args.dry_run,
+                   workers=args.jobs)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
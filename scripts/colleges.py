@@ -0,0 +1,30 @@
+import pandas as pd
+from datasets import load
+
+COLLEGE_COLUMNS = ["LATITUDE", "LONGITUDE", "STATE", "STABBR", "INSTNM"]
+
+
+def college_table():
+    # IPEDS UNITID -> location and name, indexed once so enrichment is one hash join.
+    table = load("colleges_cords", columns=["UNITID"] + COLLEGE_COLUMNS)
+    table = table.drop_duplicates("UNITID").set_index("UNITID")
+    table.index = table.index.astype("int64")
+    return table
+
+
+def attach_college_info(df, table=None, id_col="ipeds_id", report=True):
+    table = college_table() if table is None else table
+    # Case files carry the id as text and sometimes hold non-IPEDS ids (e.g. "laccd").
+    ids = pd.to_numeric(df[id_col], errors="coerce").astype("Int64")
+    positions = table.index.get_indexer(ids.fillna(-1).astype("int64"))
+    matched = positions >= 0
+
+    info = table.iloc[positions[matched]].reset_index(drop=True)
+    info.index = df.index[matched]
+    enriched = df.join(info[COLLEGE_COLUMNS])
+
+    if report and not matched.all():
+        unmatched = df.loc[~matched, id_col]
+        sample = ", ".join(map(str, unmatched.drop_duplicates().head(10)))
+        print(f"{len(unmatched)} of {len(df)} rows have no coordinates for {id_col} (e.g. {sample})")
+    return enriched
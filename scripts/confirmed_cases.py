@@ -1,9 +1,10 @@
-import pandas as pd
 import plotly.graph_objects as go
-from datetime import datetime
+from datasets import load
+from html_export import write_html
+from downsample import attach_lod
+from waves import ERA_DESCRIPTIONS, entity_waves
 
-df = pd.read_csv('../data/weekly-confirmed-covid-19-cases-per-million-people.csv')
-df['Day'] = pd.to_datetime(df['Day'])
+df = load('weekly-confirmed-covid-19-cases-per-million-people')
 
 fig = go.Figure()
 
@@ -21,89 +22,44 @@ fig.add_trace(go.Scatter(
     )
 ))
 
-waves = [
-    {'name': 'First wave', 'start': '2020-03-01', 'end': '2020-05-31', 'color': 'rgba(128,165,128,0.2)'},
-    {'name': 'Second wave', 'start': '2020-10-01', 'end': '2021-02-28', 'color': 'rgba(255,165,0,0.2)'},
-    {'name': 'Delta variant', 'start': '2021-06-01', 'end': '2021-10-31', 'color': 'rgba(255,255,0,0.2)'},
-    {'name': 'Omicron variant', 'start': '2021-12-01', 'end': '2022-03-15', 'color': 'rgba(255,0,0,0.2)'}
-]
+# At most one point per horizontal pixel, finer tiers are swapped in on zoom.
+attach_lod(fig, 0, df['Day'], df['Weekly cases per million people'], target=1400)
 
-for wave in waves:
+wave_colors = {
+    'First wave': 'rgba(128,165,128,0.2)',
+    'Second wave': 'rgba(255,165,0,0.2)',
+    'Delta variant': 'rgba(255,255,0,0.2)',
+    'Omicron variant': 'rgba(255,0,0,0.2)',
+}
+us_waves = entity_waves('weekly-confirmed-covid-19-cases-per-million-people', 'Weekly cases per million people', 'United States')
+
+for label, color in wave_colors.items():
+    if label not in us_waves.index:
+        continue
+    wave = us_waves.loc[label]
     fig.add_vrect(
         x0=wave['start'],
         x1=wave['end'],
-        fillcolor=wave['color'],
+        fillcolor=color,
         opacity=0.5,
         layer="below",
         line_width=0)
-
-fig.add_annotation(
-    x=datetime(2020, 5, 6),
-    y=df['Weekly cases per million people'].max() * 0.2,
-    text="First wave<br>Spring 2020",
-    showarrow=True,
-    arrowhead=2,
-    arrowsize=1,
-    arrowwidth=2,
-    arrowcolor="black",
-    ax=0,
-    ay=-60,
-    bgcolor="white",
-    bordercolor="black",
-    borderwidth=1,
-    font=dict(size=16)
-)
-
-fig.add_annotation(
-    x=datetime(2020, 12, 25),
-    y=df['Weekly cases per million people'].max() * 0.4,
-    text="Second wave<br>Winter-Spring 2020/2021",
-    showarrow=True,
-    arrowhead=2,
-    arrowsize=1,
-    arrowwidth=2,
-    arrowcolor="black",
-    ax=0,
-    ay=-60,
-    bgcolor="white",
-    bordercolor="black",
-    borderwidth=1,
-    font=dict(size=16)
-)
-
-fig.add_annotation(
-    x=datetime(2021, 9, 5),
-    y=df[df['Day'].dt.year == 2021]['Weekly cases per million people'].max() * 0.70,
-    text="Delta variant<br>Summer 2021",
-    showarrow=True,
-    arrowhead=2,
-    arrowsize=1,
-    arrowwidth=2,
-    arrowcolor="black",
-    ax=0,
-    ay=-60,
-    bgcolor="white",
-    bordercolor="black",
-    borderwidth=1,
-    font=dict(size=16)
-)
-
-fig.add_annotation(
-    x=datetime(2022, 1, 20),
-    y=df['Weekly cases per million people'].max() * 1.05,
-    text="Omicron variant<br>Winter 2022",
-    showarrow=True,
-    arrowhead=2,
-    arrowsize=1,
-    arrowwidth=2,
-    arrowcolor="black",
-    ax=0,
-    ay=-60,
-    bgcolor="white",
-    bordercolor="black",
-    borderwidth=1,
-    font=dict(size=16)
-)
+    fig.add_annotation(
+        x=wave['peak'],
+        y=wave['peak_value'],
+        text=f"{label}<br>{ERA_DESCRIPTIONS[label]}",
+        showarrow=True,
+        arrowhead=2,
+        arrowsize=1,
+        arrowwidth=2,
+        arrowcolor="black",
+        ax=0,
+        ay=-60,
+        bgcolor="white",
+        bordercolor="black",
+        borderwidth=1,
+        font=dict(size=16)
+    )
 
 fig.update_layout(
     title=dict(
@@ -142,4 +98,4 @@ fig.update_layout(
 )
 
 #fig.show()
-fig.write_html("../plots/confirmed_cases.html")
\ No newline at end of file
+write_html(fig, "../plots/confirmed_cases.html")
\ No newline at end of file
@@ -0,0 +1,322 @@
+import hashlib
+import io
+import json
+import os
+import shutil
+import tempfile
+
+import pandas as pd
+
+import geography
+from entity_index import read_entities
+
+try:
+    import pyarrow  # noqa: F401
+    HAVE_PYARROW = True
+except ImportError:
+    HAVE_PYARROW = False
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+CACHE_VERSION = 3
+ROW_GROUP_SIZE = 4096
+CSV_CHUNK_SIZE = 50_000
+TAIL_BYTES = 1 << 16
+
+# OWID exports are sorted by Entity, their first column, so single-entity reads can
+# go through the byte-range index in entity_index.py.
+OWID = {"dates": ["Day"], "categories": ["Entity", "Code"], "entity": "Entity", "indexed": True}
+
+# BLS exports mark missing months with "-"; see bls.py for reading them.
+BLS = {"read_csv": {"na_values": ["-"]}}
+BLS_MONTHLY = {**BLS, "dates": ["Date"], "date_format": "%b %Y"}
+
+# "states" columns hold state names and become categoricals coded like the
+# canonical table in geography.py; "integers" columns are stored in the smallest
+# integer type that fits.
+DATASETS = {
+    "bls_export_prices": BLS_MONTHLY,
+    "bls_import_prices": BLS_MONTHLY,
+    "bls_unemployment_rate": BLS_MONTHLY,
+    "bls_unemployment_rate_per_state": {**BLS, "states": ["State"]},
+    "colleges": {"dates": ["date"], "categories": ["state", "county", "city"]},
+    "colleges_cords": {"categories": ["STATE", "STABBR"]},
+    "cumulative-confirmed-covid-19-cases-per-million-people": OWID,
+    "cumulative-confirmed-covid-19-deaths-per-million-people": OWID,
+    "current-covid-patients-hospital": OWID,
+    "current-covid-patients-icu": OWID,
+    "states_cords": {},
+    "united_states_covid19_deaths_ed_visits_and_positivity_by_state": {"read_csv": {"skiprows": 2},
+                                                                        "states": ["State/Territory"]},
+    "us-states": {"dates": ["date"], "states": ["state"], "entity": "state", "integers": ["fips", "cases", "deaths"]},
+    "us_state_vaccinations": {"dates": ["date"], "states": ["location"], "entity": "location"},
+    "weekly-confirmed-covid-19-cases-per-million-people": OWID,
+    "weekly-confirmed-covid-19-deaths-per-million-people": OWID,
+    "weekly-hospital-admissions-covid": OWID,
+}
+
+
+def csv_path(name):
+    return os.path.join(DATA_DIR, name + ".csv")
+
+
+def cache_paths(name):
+    # The Parquet cache is a directory of parts: a full rebuild writes part 0 and
+    # ingest.py appends one part per batch of new rows.
+    cache_dir = os.path.join(DATA_DIR, ".cache")
+    return os.path.join(cache_dir, name + ".parquet"), os.path.join(cache_dir, name + ".json")
+
+
+def part_path(cache_dir, part):
+    return os.path.join(cache_dir, f"part-{part:05d}.parquet")
+
+
+def file_digest(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def tail_digest(path, size):
+    # Fingerprint of the bytes just before `size`: a file that grew by appending
+    # still has them, a rewritten one almost certainly does not.
+    with open(path, "rb") as f:
+        f.seek(max(0, size - TAIL_BYTES))
+        return hashlib.sha256(f.read(min(size, TAIL_BYTES))).hexdigest()
+
+
+def last_dates(df, spec):
+    # Latest date per entity, the high-water mark ingest.py appends after.
+    if "entity" not in spec or not spec.get("dates"):
+        return None
+    latest = df.groupby(spec["entity"], observed=True)[spec["dates"][0]].max()
+    return {str(entity): day.isoformat() for entity, day in latest.items()}
+
+
+def spec_digest(spec):
+    # State codes follow the canonical table, so caches with state columns go
+    # stale when it changes.
+    table = geography.table_digest() if spec.get("states") else None
+    return hashlib.sha256(json.dumps([CACHE_VERSION, spec, table], sort_keys=True).encode()).hexdigest()
+
+
+def convert(df, spec):
+    for col in spec.get("dates", []):
+        if col in df:
+            df[col] = pd.to_datetime(df[col], format=spec.get("date_format"))
+    for col in spec.get("categories", []):
+        if col in df:
+            df[col] = df[col].astype("category")
+    for col in spec.get("states", []):
+        if col in df:
+            df[col] = geography.state_names(df[col])
+    for col in spec.get("integers", []):
+        if col in df:
+            df[col] = pd.to_numeric(df[col], downcast="integer")
+    return df
+
+
+def read_csv(name, **kwargs):
+    spec = DATASETS[name]
+    return convert(pd.read_csv(csv_path(name), **spec.get("read_csv", {}), **kwargs), spec)
+
+
+def read_csv_filtered(name, columns, entities, start, end):
+    # Filter chunk by chunk while every column is still a raw string, so rows of
+    # other entities are never converted into typed values.
+    spec = DATASETS[name]
+    usecols = None
+    if columns is not None:
+        usecols = list(dict.fromkeys(columns + filter_columns(spec, entities, start, end)))
+    chunks = []
+    reader = pd.read_csv(csv_path(name), usecols=usecols, chunksize=CSV_CHUNK_SIZE, dtype=str,
+                         keep_default_na=False, **spec.get("read_csv", {}))
+    for chunk in reader:
+        if start is not None or end is not None:
+            chunk_dates = pd.to_datetime(chunk[spec["dates"][0]], format=spec.get("date_format"))
+        mask = pd.Series(True, index=chunk.index)
+        if entities is not None:
+            mask &= chunk[spec["entity"]].isin(entities)
+        if start is not None:
+            mask &= chunk_dates >= start
+        if end is not None:
+            mask &= chunk_dates <= end
+        if mask.any():
+            chunks.append(chunk[mask])
+
+    if chunks:
+        # Re-parse only the surviving rows, so column types are inferred as usual.
+        buffer = io.StringIO()
+        pd.concat(chunks).to_csv(buffer, index=False)
+        buffer.seek(0)
+        df = convert(pd.read_csv(buffer), spec)
+    else:
+        df = read_csv(name, usecols=usecols, nrows=0)
+    return df[columns] if columns is not None else df
+
+
+def read_indexed(name, columns, entities, start, end):
+    spec = DATASETS[name]
+    usecols = None
+    if columns is not None:
+        usecols = list(dict.fromkeys(columns + filter_columns(spec, None, start, end)))
+    df = convert(read_entities(csv_path(name), entities, usecols=usecols, **spec.get("read_csv", {})), spec)
+    if start is not None or end is not None:
+        df = filter_frame(df, spec, None, start, end)
+    return df[columns] if columns is not None else df
+
+
+def filter_columns(spec, entities, start, end):
+    cols = []
+    if entities is not None:
+        cols.append(spec["entity"])
+    if start is not None or end is not None:
+        cols.append(spec["dates"][0])
+    return cols
+
+
+def parquet_filters(spec, entities, start, end):
+    filters = []
+    if entities is not None:
+        filters.append((spec["entity"], "in", entities))
+    if start is not None:
+        filters.append((spec["dates"][0], ">=", start))
+    if end is not None:
+        filters.append((spec["dates"][0], "<=", end))
+    return filters or None
+
+
+def filter_frame(df, spec, entities, start, end):
+    mask = pd.Series(True, index=df.index)
+    if entities is not None:
+        mask &= df[spec["entity"]].isin(entities)
+    if start is not None:
+        mask &= df[spec["dates"][0]] >= start
+    if end is not None:
+        mask &= df[spec["dates"][0]] <= end
+    return df[mask].reset_index(drop=True)
+
+
+def is_fresh(name):
+    source = csv_path(name)
+    cache_file, meta_file = cache_paths(name)
+    if not (os.path.exists(cache_file) and os.path.exists(meta_file)):
+        return False
+    with open(meta_file, encoding="utf-8") as f:
+        meta = json.load(f)
+    if meta.get("spec") != spec_digest(DATASETS[name]):
+        return False
+
+    stat = os.stat(source)
+    if meta["size"] == stat.st_size and meta["mtime_ns"] == stat.st_mtime_ns:
+        return True
+    # Touched but possibly unchanged (e.g. a fresh checkout): fall back to the content
+    # hash, which is not known after an ingest appended to the file.
+    if meta["size"] != stat.st_size or meta["sha256"] is None or meta["sha256"] != file_digest(source):
+        return False
+    meta["mtime_ns"] = stat.st_mtime_ns
+    write_meta(meta_file, meta)
+    return True
+
+
+def write_meta(meta_file, meta):
+    tmp_path = meta_file + f".{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+    os.replace(tmp_path, meta_file)
+
+
+def stage_dir(target):
+    # Each process stages a rebuild in its own directory next to the target, so
+    # concurrent rebuilds of the same cache never share a tmp path.
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    return tempfile.mkdtemp(prefix=os.path.basename(target) + ".", suffix=".tmp", dir=os.path.dirname(target))
+
+
+def replace_dir(tmp_dir, target):
+    # Swaps tmp_dir in for target. If another process swapped in its own copy
+    # in between, that copy (built from the same source) is kept and ours dropped.
+    if os.path.isfile(target):
+        os.remove(target)
+    old_dir = target + f".{os.getpid()}.old"
+    try:
+        os.replace(target, old_dir)
+    except FileNotFoundError:
+        old_dir = None
+    try:
+        os.replace(tmp_dir, target)
+    except OSError:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    if old_dir is not None:
+        shutil.rmtree(old_dir, ignore_errors=True)
+
+
+def rebuild(name):
+    source = csv_path(name)
+    cache_dir, meta_file = cache_paths(name)
+    os.makedirs(os.path.dirname(cache_dir), exist_ok=True)
+
+    stat = os.stat(source)
+    df = read_csv(name)
+    tmp_dir = stage_dir(cache_dir)
+    # Small row groups keep per-group min/max statistics selective, so entity and
+    # date filters can skip most of an entity-sorted file.
+    df.to_parquet(part_path(tmp_dir, 0), index=False, row_group_size=ROW_GROUP_SIZE)
+    if is_fresh(name):
+        # Another process finished the same rebuild meanwhile; leave its cache in
+        # place rather than swapping it out under its readers.
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        return df
+    replace_dir(tmp_dir, cache_dir)
+    write_meta(meta_file, {
+        "source": os.path.basename(source),
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "sha256": file_digest(source),
+        "tail_sha256": tail_digest(source, stat.st_size),
+        "spec": spec_digest(DATASETS[name]),
+        "rows": len(df),
+        "parts": 1,
+        "last_dates": last_dates(df, DATASETS[name]),
+    })
+    return df
+
+
+def load(name, columns=None, entities=None, start=None, end=None):
+    if name not in DATASETS:
+        raise KeyError(f"unknown dataset {name!r}, expected one of: {', '.join(sorted(DATASETS))}")
+    spec = DATASETS[name]
+    if entities is not None and "entity" not in spec:
+        raise ValueError(f"dataset {name!r} has no entity column to filter on")
+    if (start is not None or end is not None) and not spec.get("dates"):
+        raise ValueError(f"dataset {name!r} has no date column to filter on")
+
+    if isinstance(entities, str):
+        entities = [entities]
+    start = pd.Timestamp(start) if start is not None else None
+    end = pd.Timestamp(end) if end is not None else None
+    filtered = entities is not None or start is not None or end is not None
+
+    fresh = HAVE_PYARROW and is_fresh(name)
+    if entities is not None and spec.get("indexed") and not fresh:
+        # Serve the request from the entity's byte ranges instead of parsing the
+        # whole file just to rebuild the cache.
+        return read_indexed(name, columns, entities, start, end)
+    if not HAVE_PYARROW:
+        if filtered:
+            return read_csv_filtered(name, columns, entities, start, end)
+        return read_csv(name, usecols=columns)
+    if fresh:
+        df = pd.read_parquet(cache_paths(name)[0], columns=columns,
+                             filters=parquet_filters(spec, entities, start, end))
+        if filtered:
+            # State columns keep every category so their codes stay canonical.
+            for col in df.select_dtypes("category").columns.difference(spec.get("states", [])):
+                df[col] = df[col].cat.remove_unused_categories()
+        return df.reset_index(drop=True)
+
+    df = rebuild(name)
+    if filtered:
+        df = filter_frame(df, spec, entities, start, end)
+    return df[columns] if columns is not None else df
@@ -0,0 +1,125 @@
+import numpy as np
+
+from html_export import encode
+
+# Interactive figures do not need more points per trace than there are pixels
+# across the plot: the helpers below return the indices of the points to keep.
+
+
+def as_numeric(x):
+    # Dates become epoch milliseconds, the unit plotly.js uses on date axes.
+    x = np.asarray(x)
+    if np.issubdtype(x.dtype, np.datetime64):
+        return x.astype("datetime64[ms]").astype("int64").astype("float64")
+    return x.astype("float64")
+
+
+def valid_indices(x, y):
+    return np.flatnonzero(np.isfinite(x) & np.isfinite(y))
+
+
+def gap_rows(x, y):
+    # The first row of every run of missing values between two valid points.
+    # Plotly breaks the line at such a row, so it is kept at every tier.
+    valid = valid_indices(x, y)
+    return valid[np.flatnonzero(np.diff(valid) > 1)] + 1
+
+
+def lttb(x, y, target):
+    # Largest-Triangle-Three-Buckets: one point per bucket, the one forming the
+    # largest triangle with the point kept in the previous bucket and the mean of
+    # the next bucket. Keeps peaks and the overall shape of the line.
+    x, y = as_numeric(x), np.asarray(y, dtype="float64")
+    valid = valid_indices(x, y)
+    if len(valid) <= max(target, 2):
+        return valid
+    xv, yv = x[valid], y[valid]
+    edges = np.linspace(1, len(valid) - 1, target - 1).astype("int64")
+    keep = np.empty(target, dtype="int64")
+    keep[0], keep[-1] = 0, len(valid) - 1
+    a = 0
+    for i in range(target - 2):
+        start, end = edges[i], edges[i + 1]
+        next_end = edges[i + 2] if i + 2 < len(edges) else len(valid)
+        mx, my = xv[end:next_end].mean(), yv[end:next_end].mean()
+        area = np.abs((xv[a] - mx) * (yv[start:end] - yv[a]) - (xv[a] - xv[start:end]) * (my - yv[a]))
+        a = start + int(np.argmax(area))
+        keep[i + 1] = a
+    return valid[keep]
+
+
+def minmax(x, y, buckets):
+    # Keeps the first, minimum, maximum and last point of every bucket of equal
+    # width along x, so the envelope drawn at that width is exact.
+    x, y = as_numeric(x), np.asarray(y, dtype="float64")
+    valid = valid_indices(x, y)
+    if len(valid) <= 4 * buckets:
+        return valid
+    xv, yv = x[valid], y[valid]
+    span = xv[-1] - xv[0] or 1.0
+    bucket = np.minimum(((xv - xv[0]) / span * buckets).astype("int64"), buckets - 1)
+    starts = np.flatnonzero(np.r_[True, bucket[1:] != bucket[:-1]])
+    ends = np.r_[starts[1:], len(valid)] - 1
+    order = np.lexsort((yv, bucket))
+    lows, highs = order[starts], order[ends]
+    keep = np.unique(np.concatenate([starts, ends, lows, highs]))
+    return valid[keep]
+
+
+METHODS = {"lttb": lttb, "minmax": minmax}
+# Points kept per bucket, at most.
+BUCKET_POINTS = {"lttb": 1, "minmax": 4}
+
+
+def downsample(x, y, target, method="lttb"):
+    # At most about `target` points whatever the method.
+    return METHODS[method](x, y, max(1, target // BUCKET_POINTS[method]))
+
+
+def stride_rows(n, target):
+    # Evenly spaced rows of a regular grid, ending on the last one; the step is
+    # returned too so callers can keep describing the grid with x0/dx.
+    step = max(1, -(-n // target))
+    return np.arange(n - 1, -1, -step)[::-1], step
+
+
+def lod_tiers(x, y, target, factor=4, method="lttb"):
+    # Level-of-detail tiers for one trace: the coarsest has `target` points over
+    # the whole range, each next one `factor` times more, the last is the full
+    # series. When zoomed in to a fraction f of the range the client switches to
+    # the first tier with at least target / f points. Series within `factor` of
+    # the target are not worth the extra payload and are kept whole.
+    xs, ys = as_numeric(x), np.asarray(y, dtype="float64")
+    valid, gaps = valid_indices(xs, ys), gap_rows(xs, ys)
+    tiers, points = [], target
+    while points * factor <= len(valid):
+        tiers.append(np.union1d(downsample(x, y, points, method), gaps))
+        points *= factor
+    tiers.append(np.union1d(valid, gaps))
+    return tiers
+
+
+def attach_lod(fig, trace_index, x, y, target=1400, factor=4, method="lttb"):
+    # Plots the coarsest tier and stores every tier in layout.meta, where the
+    # relayout hook added by html_export.write_html picks them up on zoom.
+    x = np.asarray(x)
+    y = np.asarray(y, dtype="float64")
+    tiers = lod_tiers(x, y, target, factor, method)
+    fig.data[trace_index].update(x=x[tiers[0]], y=y[tiers[0]])
+    if len(tiers) == 1:
+        return fig
+
+    xs = as_numeric(x)
+    meta = dict(fig.layout.meta or {})
+    lod = dict(meta.get("lod", {}))
+    lod[str(trace_index)] = {
+        "target": target,
+        "span": [float(xs[tiers[-1][0]]), float(xs[tiers[-1][-1]])],
+        "tiers": [{"points": len(rows), "x": encode(xs[rows]), "y": encode(y[rows].astype("float32"))}
+                  for rows in tiers],
+    }
+    meta["lod"] = lod
+    fig.update_layout(meta=meta)
+    if np.issubdtype(x.dtype, np.datetime64):
+        fig.update_xaxes(type="date")
+    return fig
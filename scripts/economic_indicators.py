@@ -1,18 +1,16 @@
-import pandas as pd
 import plotly.graph_objects as go
+from bls import read_wide
+from html_export import write_html
 
-df_unemp = pd.read_csv('../data/bls_unemployment_rate.csv')
-df_import = pd.read_csv('../data/bls_import_prices.csv')
-df_export = pd.read_csv('../data/bls_export_prices.csv')
-
-for df in [df_unemp, df_import, df_export]:
-    df['Date'] = pd.to_datetime(df['Date'])
+df_unemp = read_wide('bls_unemployment_rate')
+df_import = read_wide('bls_import_prices')
+df_export = read_wide('bls_export_prices')
 
 fig = go.Figure()
 
 # Unemployment
 fig.add_trace(go.Scatter(
-    x=df_unemp['Date'],
+    x=df_unemp.index,
     y=df_unemp['Total'],
     mode='lines',
     name='Unemployment rate',
@@ -29,7 +27,7 @@ fig.add_trace(go.Scatter(
 
 # Import prices
 fig.add_trace(go.Scatter(
-    x=df_import['Date'],
+    x=df_import.index,
     y=df_import['All imports'],
     mode='lines',
     name='Import prices',
@@ -46,7 +44,7 @@ fig.add_trace(go.Scatter(
 
 # Export prices
 fig.add_trace(go.Scatter(
-    x=df_export['Date'],
+    x=df_export.index,
     y=df_export['All exports'],
     mode='lines',
     name='Export prices',
@@ -123,4 +121,4 @@ fig.update_layout(
 )
 
 #fig.show()
-fig.write_html("../plots/economic_indicators.html")
\ No newline at end of file
+write_html(fig, "../plots/economic_indicators.html")
\ No newline at end of file
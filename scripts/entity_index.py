@@ -0,0 +1,132 @@
+import hashlib
+import io
+import json
+import mmap
+import os
+
+import pandas as pd
+
+INDEX_VERSION = 1
+
+
+def index_path(path):
+    return os.path.join(os.path.dirname(path), ".cache", os.path.basename(path) + ".index.json")
+
+
+def file_digest(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def first_field(buf, start, end):
+    if buf[start:start + 1] != b'"':
+        comma = buf.find(b",", start, end)
+        field = buf[start:comma if comma != -1 else end]
+        return field.rstrip(b"\r\n").decode("utf-8")
+    # Quoted entity names may contain commas ("Bonaire, Sint Eustatius and Saba").
+    pos = start + 1
+    while True:
+        quote = buf.find(b'"', pos, end)
+        if quote == -1 or buf[quote + 1:quote + 2] != b'"':
+            break
+        pos = quote + 2
+    return buf[start + 1:quote].replace(b'""', b'"').decode("utf-8")
+
+
+def scan(path):
+    # Maps each value of the first column to the byte ranges of its rows. A file
+    # sorted by entity yields one range per entity; unsorted files still work.
+    entities = {}
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return 0, entities
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+            size = len(buf)
+            header_end = buf.find(b"\n") + 1 or size
+            pos = run_start = header_end
+            current = None
+            while pos < size:
+                end = buf.find(b"\n", pos)
+                end = size if end == -1 else end + 1
+                entity = first_field(buf, pos, end)
+                if entity != current:
+                    if current is not None:
+                        entities.setdefault(current, []).append([run_start, pos])
+                    current, run_start = entity, pos
+                pos = end
+            if current is not None:
+                entities.setdefault(current, []).append([run_start, size])
+    return header_end, entities
+
+
+def build_index(path):
+    stat = os.stat(path)
+    header_end, entities = scan(path)
+    index = {
+        "version": INDEX_VERSION,
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "sha256": file_digest(path),
+        "header_end": header_end,
+        "entities": entities,
+    }
+    write_index(index_path(path), index)
+    return index
+
+
+def write_index(path, index):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + f".{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(index, f)
+    os.replace(tmp_path, path)
+
+
+def load_index(path):
+    sidecar = index_path(path)
+    if not os.path.exists(sidecar):
+        return build_index(path)
+    with open(sidecar, encoding="utf-8") as f:
+        index = json.load(f)
+    if index.get("version") != INDEX_VERSION:
+        return build_index(path)
+
+    stat = os.stat(path)
+    if index["size"] == stat.st_size and index["mtime_ns"] == stat.st_mtime_ns:
+        return index
+    if index["size"] != stat.st_size or index["sha256"] != file_digest(path):
+        return build_index(path)
+    index["mtime_ns"] = stat.st_mtime_ns
+    write_index(sidecar, index)
+    return index
+
+
+def read_ranges(path, ranges):
+    with open(path, "rb") as f:
+        try:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+                return b"".join(buf[start:end] for start, end in ranges)
+        except (ValueError, OSError):
+            # Empty files and some file systems cannot be mapped.
+            chunks = []
+            for start, end in ranges:
+                f.seek(start)
+                chunks.append(f.read(end - start))
+            return b"".join(chunks)
+
+
+def entity_ranges(index, entities):
+    return sorted(r for entity in entities for r in index["entities"].get(entity, []))
+
+
+def read_entities(path, entities, **kwargs):
+    index = load_index(path)
+    ranges = [[0, index["header_end"]]] + entity_ranges(index, entities)
+    data = read_ranges(path, ranges)
+    # The last row of a file may lack a trailing newline.
+    if not data.endswith(b"\n"):
+        data += b"\n"
+    return pd.read_csv(io.BytesIO(data), **kwargs)
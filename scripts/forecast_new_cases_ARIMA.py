@@ -1,8 +1,8 @@
-import pandas as pd
 import matplotlib.pyplot as plt
-from statsmodels.tsa.arima.model import ARIMA
 import matplotlib.dates as mdates
 from matplotlib.ticker import FuncFormatter
+from datasets import load
+from model_selection import select_order, fit_cached
 
 def format_population(pop):
     if pop >= 1_000_000_000:
@@ -14,9 +14,7 @@ def format_population(pop):
     else:
         return str(int(pop))
 
-df = pd.read_csv("../data/weekly-confirmed-covid-19-cases-per-million-people.csv")
-df["Day"] = pd.to_datetime(df["Day"])
-us_data = df[df["Entity"] == "United States"].copy()
+us_data = load("weekly-confirmed-covid-19-cases-per-million-people", entities="United States")
 us_data.set_index("Day", inplace=True)
 
 weekly_series = us_data["Weekly cases per million people"].resample("W").mean()
@@ -25,7 +23,9 @@ forecast_horizon = 52
 train_series = weekly_series.iloc[:-forecast_horizon]
 test_series = weekly_series.iloc[-forecast_horizon:]
 
-model = ARIMA(train_series, order=(5, 1, 5)).fit()
+candidate_orders = [(p, 1, q) for p in range(6) for q in range(6)]
+best = select_order(train_series, candidate_orders, model="arima", criterion="aic")
+model = fit_cached(train_series, best["order"], model="arima")
 forecast_result = model.get_forecast(steps=forecast_horizon)
 forecast = forecast_result.predicted_mean
 conf_int = forecast_result.conf_int(alpha=0.05)
@@ -1,8 +1,8 @@
-import pandas as pd
 import matplotlib.pyplot as plt
-from statsmodels.tsa.statespace.sarimax import SARIMAX
 import matplotlib.dates as mdates
 from matplotlib.ticker import FuncFormatter
+from datasets import load
+from model_selection import select_order, fit_cached
 
 def format_population(pop):
     if pop >= 1_000_000_000:
@@ -14,9 +14,7 @@ def format_population(pop):
     else:
         return str(int(pop))
 
-df = pd.read_csv("../data/weekly-confirmed-covid-19-cases-per-million-people.csv")
-df["Day"] = pd.to_datetime(df["Day"])
-us_data = df[df["Entity"] == "United States"].copy()
+us_data = load("weekly-confirmed-covid-19-cases-per-million-people", entities="United States")
 us_data.set_index("Day", inplace=True)
 
 weekly_series = us_data["Weekly cases per million people"].resample("W").mean()
@@ -25,7 +23,11 @@ forecast_horizon = 52
 train_series = weekly_series.iloc[:-forecast_horizon]
 test_series = weekly_series.iloc[-forecast_horizon:]
 
-model = SARIMAX(train_series, order=(5,1,5), seasonal_order=(1,0,1,26)).fit(disp=False)
+candidate_orders = [((p, 1, q), (P, 0, Q, 26))
+                    for p in (1, 2, 5) for q in (1, 2, 5)
+                    for P, Q in ((1, 0), (0, 1), (1, 1))]
+best = select_order(train_series, candidate_orders, model="sarima", criterion="aic")
+model = fit_cached(train_series, best["order"], best["seasonal_order"], model="sarima")
 forecast_result = model.get_forecast(steps=forecast_horizon)
 forecast = forecast_result.predicted_mean
 conf_int = forecast_result.conf_int(alpha=0.05)
@@ -0,0 +1,66 @@
+import functools
+
+import numpy as np
+import pandas as pd
+
+import datasets
+
+# The canonical state table is states_cords.csv: the 50 states, DC and Puerto
+# Rico with their two-letter code, FIPS code, centroid and resident population
+# (2020 Census, April 1). A state's row number is its integer code in every
+# state column of the project.
+TERRITORIES = ["PR"]
+
+
+@functools.lru_cache(maxsize=None)
+def load_table():
+    table = datasets.read_csv("states_cords")
+    table["fips"] = table["fips"].astype("int8")
+    table["population"] = table["population"].astype("int64")
+    return table
+
+
+def state_table():
+    return load_table().copy()
+
+
+def table_digest():
+    return datasets.file_digest(datasets.csv_path("states_cords"))
+
+
+def state_names(values):
+    # State names as a categorical whose first categories are the canonical
+    # names in table order, so canonical states get the same integer codes in
+    # every dataset; other entities (territories, "United States", ...) follow,
+    # sorted. Categorical input is recoded through its categories only.
+    names = load_table()["name"].tolist()
+    values = pd.Series(values, copy=False)
+    if not isinstance(values.dtype, pd.CategoricalDtype):
+        values = values.astype("category")
+    known = set(names)
+    extra = sorted(str(c) for c in values.cat.categories if c not in known)
+    dtype = pd.CategoricalDtype(names + extra)
+    recode = np.append(dtype.categories.get_indexer(values.cat.categories.astype(str)), -1)
+    codes = recode[values.cat.codes.to_numpy()]
+    return pd.Series(pd.Categorical.from_codes(codes, dtype=dtype), index=values.index, name=values.name)
+
+
+def state_codes(values, territories=False):
+    # Two-letter codes of state names, computed on the integer codes alone. Only
+    # the states and DC get one unless `territories`: plotly's USA-states maps
+    # have no Puerto Rico.
+    table = load_table()
+    keep = np.append(territories | ~table["state"].isin(TERRITORIES).to_numpy(), False)
+    names = state_names(values)
+    codes = names.cat.codes.to_numpy()
+    codes = np.where(keep[np.where(codes < len(table), codes, -1)], codes, -1)
+    return pd.Series(pd.Categorical.from_codes(codes, categories=table["state"]), index=names.index)
+
+
+def fifty_states(values):
+    # Mask of the rows naming one of the 50 states (no DC, no Puerto Rico).
+    table = load_table()
+    keep = ~table["state"].isin(["DC", *TERRITORIES]).to_numpy()
+    names = state_names(values)
+    codes = names.cat.codes.to_numpy()
+    return pd.Series(np.append(keep, False)[np.where(codes < len(table), codes, -1)], index=names.index)
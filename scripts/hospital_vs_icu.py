@@ -1,7 +1,9 @@
 import pandas as pd
 import matplotlib.pyplot as plt
-import matplotlib.animation as animation
-from datetime import datetime
+from datasets import load
+from animation_export import save_gif
+from alignment import align_daily, highlight_frames, month_start_indices
+from waves import ERA_DESCRIPTIONS, entity_waves
 
 def format_population(pop):
     if pop >= 1_000_000_000:
@@ -13,54 +15,26 @@ def format_population(pop):
     else:
         return str(int(pop))
 
-hospital_df = pd.read_csv("../data/current-covid-patients-hospital.csv")
-icu_df = pd.read_csv("../data/current-covid-patients-icu.csv")
+hospital_df = load("current-covid-patients-hospital", entities="United States")
+icu_df = load("current-covid-patients-icu", entities="United States")
 
-hospital_df = hospital_df[hospital_df["Entity"] == "United States"]
-icu_df = icu_df[icu_df["Entity"] == "United States"]
+dates, (hospital_values, icu_values) = align_daily([
+    hospital_df.set_index("Day")["Daily hospital occupancy"],
+    icu_df.set_index("Day")["Daily ICU occupancy"],
+])
+start, end = dates[0], dates[-1]
 
-hospital_df["Day"] = pd.to_datetime(hospital_df["Day"])
-icu_df["Day"] = pd.to_datetime(icu_df["Day"])
+wave_colors = {"Second wave": "orange", "Delta variant": "red", "Omicron variant": "blue"}
+us_waves = entity_waves("current-covid-patients-hospital", "Daily hospital occupancy", "United States")
+us_waves = us_waves.loc[[label for label in wave_colors if label in us_waves.index]]
+us_waves = us_waves[(us_waves["peak"] >= start) & (us_waves["peak"] <= end)]
+peak_locs = dates.searchsorted(us_waves["peak"]).tolist()
 
-hospital_df = hospital_df.sort_values("Day").set_index("Day")
-icu_df = icu_df.sort_values("Day").set_index("Day")
+frame_interval = 500
+peak_pause = 10
 
-start = max(hospital_df.index.min(), icu_df.index.min())
-end = min(hospital_df.index.max(), icu_df.index.max())
-date_range = pd.date_range(start, end)
-
-hospital_df = hospital_df.reindex(date_range)
-hospital_df["Daily hospital occupancy"] = hospital_df["Daily hospital occupancy"].astype(float).interpolate()
-
-icu_df = icu_df.reindex(date_range)
-icu_df["Daily ICU occupancy"] = icu_df["Daily ICU occupancy"].astype(float).interpolate()
-
-dates = hospital_df.index
-hospital_values = hospital_df["Daily hospital occupancy"]
-icu_values = icu_df["Daily ICU occupancy"]
-
-second_wave_start = pd.Timestamp("2020-10-01")
-second_wave_end = pd.Timestamp("2021-03-31")
-delta_start = pd.Timestamp("2021-05-01")
-delta_end = pd.Timestamp("2021-10-31")
-omicron_start = pd.Timestamp("2021-12-01")
-omicron_end = pd.Timestamp("2022-03-31")
-
-second_wave_peak = hospital_values[second_wave_start:second_wave_end].idxmax()
-delta_peak = hospital_values[delta_start:delta_end].idxmax()
-omicron_peak = hospital_values[omicron_start:omicron_end].idxmax()
-
-monthly_dates = pd.date_range(start=start, end=end, freq="MS")
-monthly_indices = [dates.get_loc(d) for d in monthly_dates if d in dates]
-peak_dates = [second_wave_peak, delta_peak, omicron_peak]
-peak_locs = [dates.get_loc(p) for p in peak_dates]
-
-all_highlight_indices = sorted(set(monthly_indices + peak_locs))
-highlight_indices = []
-for idx in all_highlight_indices:
-    highlight_indices.append(idx)
-    if idx in peak_locs:
-        highlight_indices.extend([idx] * 10)
+highlight_indices, frame_durations = highlight_frames(month_start_indices(dates), peak_locs,
+                                                      frame_interval, peak_pause)
 
 fig, ax = plt.subplots(figsize=(14, 8))
 
@@ -90,37 +64,19 @@ ax.set_ylabel("Occupancy", fontsize=15, fontweight='bold')
 ax.grid(color="lightgrey")
 plt.tight_layout()
 
-second_wave_patch = ax.axvspan(second_wave_start, second_wave_end, color="orange", alpha=0.15)
-delta_patch = ax.axvspan(delta_start, delta_end, color="red", alpha=0.15)
-omicron_patch = ax.axvspan(omicron_start, omicron_end, color="blue", alpha=0.15)
-
-second_wave_patch.set_visible(False)
-delta_patch.set_visible(False)
-omicron_patch.set_visible(False)
-
-second_wave_annot = ax.annotate("Second wave\nWinter–Spring 2020/2021",
-            xy=(second_wave_peak, hospital_values[second_wave_peak]),
-            xytext=(second_wave_peak, hospital_values[second_wave_peak] + ymax * 0.1),
-            ha="center",
-            arrowprops=dict(facecolor="black", arrowstyle="->"),
-            fontsize=10, bbox=dict(facecolor="white", edgecolor="gray"),
-            visible=False)
-
-delta_annot = ax.annotate("Delta variant\nSummer 2021",
-            xy=(delta_peak, hospital_values[delta_peak]),
-            xytext=(delta_peak, hospital_values[delta_peak] + ymax * 0.1),
-            ha="center",
-            arrowprops=dict(facecolor="black", arrowstyle="->"),
-            fontsize=10, bbox=dict(facecolor="white", edgecolor="gray"),
-            visible=False)
-
-omicron_annot = ax.annotate("Omicron variant\nWinter 2022",
-            xy=(omicron_peak, hospital_values[omicron_peak]),
-            xytext=(omicron_peak, hospital_values[omicron_peak] + ymax * 0.1),
-            ha="center",
-            arrowprops=dict(facecolor="black", arrowstyle="->"),
-            fontsize=10, bbox=dict(facecolor="white", edgecolor="gray"),
-            visible=False)
+wave_artists = []
+highlight_artists = []
+for (label, wave), loc in zip(us_waves.iterrows(), peak_locs):
+    patch = ax.axvspan(wave["start"], wave["end"], color=wave_colors[label], alpha=0.15, visible=False)
+    annot = ax.annotate(f"{label}\n{ERA_DESCRIPTIONS[label]}",
+                xy=(wave["peak"], hospital_values[loc]),
+                xytext=(wave["peak"], hospital_values[loc] + ymax * 0.1),
+                ha="center",
+                arrowprops=dict(facecolor="black", arrowstyle="->"),
+                fontsize=10, bbox=dict(facecolor="white", edgecolor="gray"),
+                visible=False)
+    wave_artists.append((wave["start"], wave["peak"], patch, annot))
+    highlight_artists += [patch, annot]
 
 def plot(i):
     idx = highlight_indices[i]
@@ -130,21 +86,13 @@ def plot(i):
     line2.set_data(dates[:idx], icu_values[:idx])
     date_text.set_text(current_date.strftime("%b %Y"))
 
-    if current_date >= second_wave_start:
-        second_wave_patch.set_visible(True)
-    if current_date >= delta_start:
-        delta_patch.set_visible(True)
-    if current_date >= omicron_start:
-        omicron_patch.set_visible(True)
-
-    if current_date >= second_wave_peak:
-        second_wave_annot.set_visible(True)
-    if current_date >= delta_peak:
-        delta_annot.set_visible(True)
-    if current_date >= omicron_peak:
-        omicron_annot.set_visible(True)
+    for wave_start, wave_peak, patch, annot in wave_artists:
+        if current_date >= wave_start:
+            patch.set_visible(True)
+        if current_date >= wave_peak:
+            annot.set_visible(True)
 
-    return line1, line2, date_text, second_wave_patch, delta_patch, omicron_patch, second_wave_annot, delta_annot, omicron_annot
+    return (line1, line2, date_text, *highlight_artists)
 
-ani = animation.FuncAnimation(fig, plot, frames=len(highlight_indices), interval=500, repeat=True)
-ani.save("../plots/usa_hospital_icu.gif", writer="pillow", dpi=300)
+save_gif(fig, plot, len(highlight_indices), "../plots/usa_hospital_icu.gif", dpi=300,
+         durations=frame_durations)
@@ -0,0 +1,140 @@
+import base64
+import os
+
+import numpy as np
+import plotly.io as pio
+
+# Trace attributes that are never data arrays, even when they hold numbers.
+SKIPPED_KEYS = {"geojson", "range", "layer", "layers"}
+MIN_ARRAY_SIZE = 8
+INT_TYPES = ["int8", "uint8", "int16", "uint16", "int32", "uint32"]
+SHORT_TYPES = {"int8": "i1", "uint8": "u1", "int16": "i2", "uint16": "u2",
+               "int32": "i4", "uint32": "u4", "float32": "f4", "float64": "f8"}
+DTYPES = {short: dtype for dtype, short in SHORT_TYPES.items()}
+
+# Swaps the level-of-detail tiers stored by downsample.attach_lod in
+# layout.meta.lod as the x range changes.
+LOD_SCRIPT = """
+(function() {
+    var gd = document.getElementById('{plot_id}');
+    var lod = gd.layout.meta.lod;
+    var current = {};
+    gd.on('plotly_relayout', function() {
+        var axis = gd._fullLayout.xaxis;
+        var visible = axis.r2l(axis.range[1]) - axis.r2l(axis.range[0]);
+        Object.keys(lod).forEach(function(key) {
+            var entry = lod[key];
+            var fraction = Math.min(1, visible / (entry.span[1] - entry.span[0]));
+            var tier = 0;
+            while (tier < entry.tiers.length - 1 && entry.tiers[tier].points * fraction < entry.target) {
+                tier++;
+            }
+            if (current[key] === tier) {
+                return;
+            }
+            current[key] = tier;
+            Plotly.restyle(gd, {x: [entry.tiers[tier].x], y: [entry.tiers[tier].y]}, [+key]);
+        });
+    });
+})();
+"""
+
+
+def decode(spec):
+    values = np.frombuffer(base64.b64decode(spec["bdata"]), dtype=DTYPES[spec["dtype"]])
+    if "shape" in spec:
+        values = values.reshape([int(n) for n in str(spec["shape"]).split(",")])
+    return values
+
+
+def encode(values):
+    spec = {"dtype": SHORT_TYPES[str(values.dtype)],
+            "bdata": base64.b64encode(np.ascontiguousarray(values)).decode("ascii")}
+    if values.ndim > 1:
+        spec["shape"] = ", ".join(map(str, values.shape))
+    return spec
+
+
+def smallest_dtype(values):
+    # Whole numbers go to the narrowest integer type that holds them, anything
+    # else to float32: 7 significant digits are far more than a plot can show.
+    finite = values[np.isfinite(values)] if values.dtype.kind == "f" else values
+    if len(finite) == len(values.ravel()) and np.array_equal(finite, np.round(finite)):
+        lo, hi = (finite.min(), finite.max()) if finite.size else (0, 0)
+        for dtype in INT_TYPES:
+            info = np.iinfo(dtype)
+            if info.min <= lo and hi <= info.max:
+                return values.astype(dtype)
+    return values.astype("float32")
+
+
+def compact_array(value):
+    if isinstance(value, dict) and "bdata" in value:
+        values = decode(value)
+    elif isinstance(value, (list, tuple, np.ndarray)):
+        try:
+            values = np.asarray(value)
+        except ValueError:
+            return None
+    else:
+        return None
+    if values.dtype.kind not in "iuf" or values.size < MIN_ARRAY_SIZE or values.ndim > 2:
+        return None
+    return encode(smallest_dtype(values))
+
+
+def compact(obj):
+    # Rewrites numeric arrays in traces as base64 typed arrays
+    # ({"dtype": ..., "bdata": ...}), which plotly.js decodes without parsing
+    # one JSON number per value.
+    if isinstance(obj, dict):
+        for key, value in obj.items():
+            if key in SKIPPED_KEYS:
+                continue
+            spec = compact_array(value)
+            if spec is not None:
+                obj[key] = spec
+            else:
+                compact(value)
+    elif isinstance(obj, list):
+        for value in obj:
+            if isinstance(value, (dict, list)):
+                compact(value)
+
+
+def compact_buttons(layout):
+    # Dropdowns that restyle traces carry one array per trace for each argument
+    # ({"y": [y0, y1, ...]}), which are encoded the same way as trace data.
+    for menu in layout.get("updatemenus", []):
+        for button in menu.get("buttons", []):
+            if button.get("method") not in ("restyle", "update") or not button.get("args"):
+                continue
+            style = button["args"][0]
+            for key, values in style.items():
+                if not isinstance(values, list) or key in SKIPPED_KEYS:
+                    continue
+                specs = [compact_array(v) for v in values]
+                style[key] = [v if spec is None else spec for v, spec in zip(values, specs)]
+
+
+def write_html(fig, path, include_plotlyjs="directory", **kwargs):
+    # include_plotlyjs="directory" references one plotly.min.js written next to
+    # the HTML files instead of embedding the ~3.5 MB bundle in every page.
+    fig_dict = fig.to_dict()
+    for trace in fig_dict.get("data", []):
+        compact(trace)
+    for frame in fig_dict.get("frames", []):
+        for trace in frame.get("data", []):
+            compact(trace)
+    compact_buttons(fig_dict.get("layout", {}))
+    if (fig_dict.get("layout", {}).get("meta") or {}).get("lod"):
+        kwargs["post_script"] = [LOD_SCRIPT] + list(kwargs.get("post_script") or [])
+    pio.write_html(fig_dict, path, include_plotlyjs=include_plotlyjs, validate=False, **kwargs)
+
+    size = os.path.getsize(path)
+    message = f"{path}: {size / 1e6:.2f} MB"
+    bundle = os.path.join(os.path.dirname(path), "plotly.min.js")
+    if include_plotlyjs == "directory" and os.path.exists(bundle):
+        message += f" (+ shared plotly.min.js {os.path.getsize(bundle) / 1e6:.2f} MB)"
+    print(message)
+    return size
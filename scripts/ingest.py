@@ -0,0 +1,207 @@
+import argparse
+import io
+import json
+import os
+import sys
+import time
+
+import pandas as pd
+
+import datasets
+import state_metrics
+
+# Derived caches that can take a source's new rows instead of being rebuilt from
+# scratch: (is_current(sources), extend(rows)) pairs, see state_metrics.py. Other
+# derived caches (waves, entity indexes) notice the grown source and rebuild.
+DERIVED = {
+    "us-states": [(state_metrics.is_current, state_metrics.extend)],
+}
+
+
+def appendable(name):
+    spec = datasets.DATASETS[name]
+    return "entity" in spec and bool(spec.get("dates")) and "read_csv" not in spec
+
+
+def read_mark(name):
+    # The high-water mark of the cached store: the source size it was built
+    # from, a fingerprint of its last bytes and the latest date per entity.
+    cache_dir, meta_file = datasets.cache_paths(name)
+    if not (datasets.HAVE_PYARROW and os.path.isdir(cache_dir) and os.path.exists(meta_file)):
+        return None
+    with open(meta_file, encoding="utf-8") as f:
+        meta = json.load(f)
+    if meta.get("spec") != datasets.spec_digest(datasets.DATASETS[name]) or "tail_sha256" not in meta:
+        return None
+    return meta
+
+
+def read_header(path):
+    with open(path, "rb") as f:
+        return f.readline()
+
+
+def grown_tail(path, mark):
+    # Bytes appended to `path` after the mark, or None if the part before it changed.
+    size = os.path.getsize(path)
+    if size < mark["size"] or datasets.tail_digest(path, mark["size"]) != mark["tail_sha256"]:
+        return None
+    with open(path, "rb") as f:
+        f.seek(mark["size"])
+        return f.read()
+
+
+def drop_body(name, drop, mark):
+    # A drop is either a newer copy of the whole source or a CSV of new rows only,
+    # with the source's header.
+    body = grown_tail(drop, mark)
+    if body is not None:
+        return body
+    header = read_header(drop)
+    if header.rstrip(b"\r\n") != read_header(datasets.csv_path(name)).rstrip(b"\r\n"):
+        raise ValueError(f"{drop}: header does not match {name}.csv")
+    with open(drop, "rb") as f:
+        f.seek(len(header))
+        return f.read()
+
+
+def parse(name, body):
+    header = read_header(datasets.csv_path(name))
+    if not header.endswith(b"\n"):
+        header += b"\n"
+    spec = datasets.DATASETS[name]
+    rows = pd.read_csv(io.BytesIO(header + body))
+    # Unparseable dates become NaT here, so validate() reports them with the rest.
+    for col in spec["dates"]:
+        if col in rows:
+            rows[col] = pd.to_datetime(rows[col], format=spec.get("date_format"), errors="coerce")
+    return datasets.convert(rows, spec)
+
+
+def validate(name, rows, mark):
+    # Returns the rows as an Arrow table in the store's schema, or raises with
+    # every problem found.
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    spec = datasets.DATASETS[name]
+    entity, date = spec["entity"], spec["dates"][0]
+    schema = pq.read_schema(datasets.part_path(datasets.cache_paths(name)[0], 0))
+    problems = []
+    if list(rows.columns) != schema.names:
+        problems.append(f"columns {list(rows.columns)} do not match {schema.names}")
+    else:
+        if rows[entity].isna().any():
+            problems.append(f"{int(rows[entity].isna().sum())} rows without {entity}")
+        if rows[date].isna().any():
+            problems.append(f"{int(rows[date].isna().sum())} rows without a valid {date}")
+        if rows[date].max() > pd.Timestamp.now().normalize():
+            problems.append(f"dates in the future, up to {rows[date].max():%Y-%m-%d}")
+        duplicated = rows.duplicated([entity, date])
+        if duplicated.any():
+            problems.append(f"{int(duplicated.sum())} duplicate ({entity}, {date}) rows")
+        last = pd.to_datetime(rows[entity].astype(str).map(mark["last_dates"] or {}))
+        stale = rows[date] <= last
+        if stale.any():
+            first = rows[stale].iloc[0]
+            problems.append(f"{int(stale.sum())} rows at or before the ingested high-water mark, "
+                            f"e.g. {first[entity]} {first[date]:%Y-%m-%d}")
+        numeric = rows.select_dtypes("number")
+        if (numeric < 0).any().any():
+            problems.append(f"negative values in {', '.join(numeric.columns[(numeric < 0).any()])}")
+    if not problems:
+        try:
+            return pa.Table.from_pandas(rows, schema=schema, preserve_index=False)
+        except (pa.ArrowInvalid, pa.ArrowTypeError, ValueError) as e:
+            problems.append(f"rows do not fit the stored types: {e}")
+    raise ValueError("; ".join(problems))
+
+
+def append_source(name, body):
+    path = datasets.csv_path(name)
+    with open(path, "rb+") as f:
+        f.seek(0, os.SEEK_END)
+        if f.tell():
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b"\n":
+                f.write(b"\n")
+        f.write(body.lstrip(b"\r\n"))
+
+
+def ingest(name, drop=None):
+    # Appends the rows added to a source since the last build or ingest to its
+    # Parquet store, parsing only those rows. Falls back to a full rebuild when
+    # there is no store yet or the ingested part of the source was rewritten.
+    import pyarrow.parquet as pq
+
+    source = datasets.csv_path(name)
+    mark = read_mark(name)
+    body = None
+    if mark is not None:
+        body = drop_body(name, drop, mark) if drop else grown_tail(source, mark)
+    if body is None:
+        if drop:
+            raise ValueError(f"no cached store to append {drop} to, run once without --from")
+        df = datasets.rebuild(name)
+        return "rebuilt", len(df)
+    if not body.strip():
+        return "up to date", 0
+
+    rows = parse(name, body)
+    table = validate(name, rows, mark)
+    known = {"size": mark["size"], "mtime_ns": mark["mtime_ns"]}
+    derived = [extend for is_current, extend in DERIVED.get(name, []) if is_current({name: known})]
+
+    if drop:
+        append_source(name, body)
+    cache_dir, meta_file = datasets.cache_paths(name)
+    pq.write_table(table, datasets.part_path(cache_dir, mark["parts"]))
+    spec = datasets.DATASETS[name]
+    stat = os.stat(source)
+    mark.update({
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "sha256": None,
+        "tail_sha256": datasets.tail_digest(source, stat.st_size),
+        "rows": mark["rows"] + len(rows),
+        "parts": mark["parts"] + 1,
+        "last_dates": {**(mark["last_dates"] or {}), **datasets.last_dates(rows, spec)},
+    })
+    datasets.write_meta(meta_file, mark)
+    for extend in derived:
+        extend(rows)
+    return "appended", len(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Append new rows of the NYT/OWID sources to the cached store")
+    parser.add_argument("sources", nargs="*", help="datasets to ingest (default: every appendable one)")
+    parser.add_argument("--from", dest="drop", help="new data for a single source: a newer copy of the "
+                                                    "whole file or a CSV of the new rows only")
+    args = parser.parse_args()
+    if not datasets.HAVE_PYARROW:
+        parser.error("ingesting needs pyarrow for the Parquet store")
+
+    names = args.sources or [name for name in sorted(datasets.DATASETS)
+                             if appendable(name) and os.path.exists(datasets.csv_path(name))]
+    unknown = [name for name in names if name not in datasets.DATASETS or not appendable(name)]
+    if unknown:
+        parser.error(f"not appendable: {', '.join(unknown)}")
+    if args.drop and len(names) != 1:
+        parser.error("--from needs exactly one source")
+
+    failed = False
+    for name in names:
+        t0 = time.perf_counter()
+        try:
+            status, rows = ingest(name, args.drop)
+        except ValueError as e:
+            print(f"{name}: rejected: {e}", file=sys.stderr)
+            failed = True
+            continue
+        print(f"{name}: {status}, {rows} rows in {time.perf_counter() - t0:.2f}s")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+import matplotlib.animation as animation
+import matplotlib.dates as mdates
+
+
+def entity_arrays(df, value_col, entities, date_col="Day", entity_col="Entity"):
+    # One sorted (x, y) pair of arrays per entity, computed once for all frames.
+    arrays = {}
+    for entity, group in df.groupby(entity_col, observed=True, sort=False):
+        if entity not in entities:
+            continue
+        group = group.sort_values(date_col)
+        arrays[entity] = (
+            mdates.date2num(group[date_col].to_numpy()),
+            group[value_col].to_numpy(dtype=float),
+        )
+    return arrays
+
+
+def animate_line_race(fig, ax, df, value_col, entities, colors, frames,
+                      date_col="Day", entity_col="Entity", label_offset=pd.Timedelta(days=30),
+                      date_text_pos=(0.05, 0.89), interval=110):
+    # The axes (title, limits, ticks, grid) are set up once by the caller; every
+    # frame only moves the data of artists created here.
+    arrays = entity_arrays(df, value_col, entities, date_col, entity_col)
+    frame_nums = mdates.date2num(pd.DatetimeIndex(frames).to_numpy())
+    offset = label_offset / pd.Timedelta(days=1)
+
+    artists = {}
+    for entity in entities:
+        color = colors[entity]
+        line, = ax.plot([], [], color=color, animated=True)
+        dot, = ax.plot([], [], "o", color=color, markersize=5.5, animated=True)
+        label = ax.text(0, 0, entity, fontsize=11, fontweight="bold", color=color,
+                        va="center", animated=True, visible=False)
+        artists[entity] = (line, dot, label)
+
+    date_text = ax.text(*date_text_pos, "", transform=ax.transAxes,
+                        fontsize=20, fontweight="bold", alpha=0.5, animated=True)
+    all_artists = [a for group in artists.values() for a in group] + [date_text]
+
+    def update(i):
+        day = frame_nums[i]
+        for entity, (line, dot, label) in artists.items():
+            if entity not in arrays:
+                continue
+            x, y = arrays[entity]
+            n = np.searchsorted(x, day, side="right")
+            line.set_data(x[:n], y[:n])
+            if n:
+                dot.set_data(x[n - 1:n], y[n - 1:n])
+                label.set_position((x[n - 1] + offset, y[n - 1]))
+            else:
+                dot.set_data([], [])
+            label.set_visible(bool(n))
+        date_text.set_text(mdates.num2date(day).strftime("%Y-%m-%d"))
+        return all_artists
+
+    return animation.FuncAnimation(fig, update, frames=len(frame_nums), interval=interval,
+                                   repeat=True, blit=True)
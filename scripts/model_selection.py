@@ -0,0 +1,154 @@
+import concurrent.futures
+import hashlib
+import json
+import multiprocessing
+import os
+import warnings
+
+import numpy as np
+from statsmodels.tools.sm_exceptions import ConvergenceWarning
+from statsmodels.tsa.arima.model import ARIMA
+from statsmodels.tsa.statespace.sarimax import SARIMAX
+
+import datasets
+
+MODELS = {"arima": ARIMA, "sarima": SARIMAX}
+NO_SEASON = (0, 0, 0, 0)
+MAX_PARAM = 1e6
+
+
+class Diverged(Exception):
+    pass
+
+
+def cache_dir(model):
+    return os.path.join(datasets.DATA_DIR, ".cache", "models", model)
+
+
+def series_key(series):
+    h = hashlib.sha256()
+    h.update(str(getattr(series.index, "freqstr", None)).encode())
+    h.update(series.index.asi8.tobytes() if hasattr(series.index, "asi8") else series.index.to_numpy().tobytes())
+    h.update(series.to_numpy(dtype="float64").tobytes())
+    return h.hexdigest()
+
+
+def order_key(order, seasonal_order):
+    return "_".join(map(str, order)) + "x" + "_".join(map(str, seasonal_order))
+
+
+def cache_path(model, key, order, seasonal_order):
+    return os.path.join(cache_dir(model), key[:16], order_key(order, seasonal_order) + ".json")
+
+
+def read_cached(model, key, order, seasonal_order):
+    path = cache_path(model, key, order, seasonal_order)
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def write_cached(model, key, result):
+    path = cache_path(model, key, tuple(result["order"]), tuple(result["seasonal_order"]))
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + f".{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(result, f)
+    os.replace(tmp_path, path)
+
+
+def build_model(model, series, order, seasonal_order=NO_SEASON):
+    return MODELS[model](series, order=order, seasonal_order=seasonal_order)
+
+
+def fit_kwargs(model, maxiter, callback=None):
+    if model == "arima":
+        # ARIMA.fit forwards optimizer options to the state space fit.
+        return {"method_kwargs": {"maxiter": maxiter, "disp": False, "callback": callback}}
+    return {"maxiter": maxiter, "disp": False, "callback": callback}
+
+
+def check_params(params):
+    # Called by the optimizer after every iteration: give up on a candidate as soon
+    # as its parameters blow up instead of letting it run to maxiter.
+    if not np.all(np.isfinite(params)) or np.abs(params).max() > MAX_PARAM:
+        raise Diverged
+
+
+def fit_order(series, order, seasonal_order=NO_SEASON, model="arima", maxiter=200):
+    result = {"order": list(order), "seasonal_order": list(seasonal_order)}
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter("always")
+        try:
+            fitted = build_model(model, series, order, seasonal_order).fit(
+                **fit_kwargs(model, maxiter, check_params))
+        except Diverged:
+            return {**result, "status": "diverged", "aic": None, "bic": None, "params": None}
+        except (np.linalg.LinAlgError, ValueError) as e:
+            return {**result, "status": f"failed: {e}", "aic": None, "bic": None, "params": None}
+
+    if not (np.isfinite(fitted.aic) and np.isfinite(fitted.bic)):
+        return {**result, "status": "diverged", "aic": None, "bic": None, "params": None}
+    converged = fitted.mle_retvals.get("converged", True) if fitted.mle_retvals else True
+    converged = converged and not any(issubclass(w.category, ConvergenceWarning) for w in caught)
+    return {
+        **result,
+        "status": "ok" if converged else "not converged",
+        "aic": float(fitted.aic),
+        "bic": float(fitted.bic),
+        "params": [float(p) for p in fitted.params],
+    }
+
+
+def fit_candidate(args):
+    series, order, seasonal_order, model, maxiter, key = args
+    result = fit_order(series, order, seasonal_order, model, maxiter)
+    write_cached(model, key, result)
+    return result
+
+
+def select_order(series, candidates, model="arima", criterion="aic", workers=None, maxiter=200):
+    # candidates: (p, d, q) tuples, or ((p, d, q), (P, D, Q, s)) pairs for SARIMA.
+    key = series_key(series)
+    results, pending = [], []
+    for candidate in candidates:
+        order, seasonal_order = (candidate if len(candidate) == 2 else (candidate, NO_SEASON))
+        cached = read_cached(model, key, tuple(order), tuple(seasonal_order))
+        if cached is not None:
+            results.append(cached)
+        else:
+            pending.append((series, tuple(order), tuple(seasonal_order), model, maxiter, key))
+
+    if pending:
+        workers = min(workers or os.cpu_count() or 1, len(pending))
+        # Forked workers: the forecast scripts calling this are module code without
+        # a __main__ guard, which spawned workers would re-run on import.
+        if workers == 1 or "fork" not in multiprocessing.get_all_start_methods():
+            results += [fit_candidate(args) for args in pending]
+        else:
+            with concurrent.futures.ProcessPoolExecutor(max_workers=workers,
+                                                        mp_context=multiprocessing.get_context("fork")) as pool:
+                results += list(pool.map(fit_candidate, pending))
+
+    usable = [r for r in results if r["status"] in ("ok", "not converged")]
+    if not usable:
+        raise RuntimeError(f"no candidate order could be fitted ({len(results)} tried)")
+    # Prefer converged fits; a non-converged one only wins if nothing converged.
+    best = min(usable, key=lambda r: (r["status"] != "ok", r[criterion]))
+    print(f"{model}: {len(pending)} fitted, {len(results) - len(pending)} cached, "
+          f"best {tuple(best['order'])}x{tuple(best['seasonal_order'])} {criterion}={best[criterion]:.1f}")
+    return best
+
+
+def fit_cached(series, order, seasonal_order=NO_SEASON, model="arima", maxiter=200, converged=False):
+    # Rebuild a fitted model from cached parameters: running the Kalman smoother
+    # once is all that is needed, no optimization. With `converged`, a fit whose
+    # optimizer did not converge is an error too.
+    key = series_key(series)
+    cached = read_cached(model, key, tuple(order), tuple(seasonal_order))
+    if cached is None or cached["params"] is None:
+        cached = fit_candidate((series, tuple(order), tuple(seasonal_order), model, maxiter, key))
+    if cached["params"] is None or (converged and cached["status"] != "ok"):
+        raise RuntimeError(f"{model} {order}x{seasonal_order} could not be fitted: {cached['status']}")
+    return build_model(model, series, order, seasonal_order).smooth(np.asarray(cached["params"]))
@@ -1,29 +1,18 @@
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
+from datasets import load
+from geography import state_codes, state_table
+from html_export import write_html
 
-df = pd.read_csv('../data/united_states_covid19_deaths_ed_visits_and_positivity_by_state.csv', skiprows=2)
+df = load('united_states_covid19_deaths_ed_visits_and_positivity_by_state')
 
-state_to_code = {
-    'Alabama': 'AL', 'Alaska': 'AK', 'Arizona': 'AZ', 'Arkansas': 'AR', 'California': 'CA',
-    'Colorado': 'CO', 'Connecticut': 'CT', 'Delaware': 'DE', 'Florida': 'FL', 'Georgia': 'GA',
-    'Hawaii': 'HI', 'Idaho': 'ID', 'Illinois': 'IL', 'Indiana': 'IN', 'Iowa': 'IA',
-    'Kansas': 'KS', 'Kentucky': 'KY', 'Louisiana': 'LA', 'Maine': 'ME', 'Maryland': 'MD',
-    'Massachusetts': 'MA', 'Michigan': 'MI', 'Minnesota': 'MN', 'Mississippi': 'MS', 'Missouri': 'MO',
-    'Montana': 'MT', 'Nebraska': 'NE', 'Nevada': 'NV', 'New Hampshire': 'NH', 'New Jersey': 'NJ',
-    'New Mexico': 'NM', 'New York': 'NY', 'North Carolina': 'NC', 'North Dakota': 'ND', 'Ohio': 'OH',
-    'Oklahoma': 'OK', 'Oregon': 'OR', 'Pennsylvania': 'PA', 'Rhode Island': 'RI', 'South Carolina': 'SC',
-    'South Dakota': 'SD', 'Tennessee': 'TN', 'Texas': 'TX', 'Utah': 'UT', 'Vermont': 'VT',
-    'Virginia': 'VA', 'Washington': 'WA', 'West Virginia': 'WV', 'Wisconsin': 'WI', 'Wyoming': 'WY',
-    'District of Columbia': 'DC'
-}
-
-df['state_code'] = df['State/Territory'].map(state_to_code)
+df['state_code'] = state_codes(df['State/Territory'])
 df = df.dropna(subset=['state_code'])
 df['Total Death rate per 100000'] = pd.to_numeric(df['Total Death rate per 100000'], errors='coerce')
 df = df.dropna(subset=['Total Death rate per 100000'])
 
-coords = pd.read_csv('../data/states_cords.csv')
+coords = state_table()
 coords = coords.rename(columns={'state': 'state_code'})
 df = df.merge(coords[['state_code', 'latitude', 'longitude']], on='state_code', how='left')
 
@@ -69,4 +58,4 @@ fig.update_layout(
 )
 
 #fig.show()
-fig.write_html("../plots/normalized_deaths_by_state.html")
+write_html(fig, "../plots/normalized_deaths_by_state.html")
@@ -0,0 +1,109 @@
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+
+def slider_steps(names, labels, frame_duration, transition):
+    return [dict(
+        method="animate",
+        label=label,
+        args=[[name], {"frame": {"duration": frame_duration, "redraw": True},
+                       "mode": "immediate",
+                       "transition": {"duration": transition}}],
+    ) for name, label in zip(names, labels)]
+
+
+def play_buttons(frame_duration, transition):
+    return [dict(
+        type="buttons",
+        x=-0.05, xanchor="left", y=0, yanchor="top",
+        buttons=[
+            dict(label="Play", method="animate",
+                 args=[None, {
+                     "frame": {"duration": frame_duration, "redraw": True},
+                     "fromcurrent": True,
+                     "transition": {"duration": transition}
+                 }]),
+            dict(label="Pause", method="animate",
+                 args=[[None], {
+                     "frame": {"duration": 0, "redraw": True},
+                     "mode": "immediate",
+                     "transition": {"duration": 0}
+                 }])
+        ]
+    )]
+
+
+def state_labels(coords, codes, font_size=12):
+    # Two-letter state codes drawn at the state centroids, a static trace that
+    # the animation frames never touch.
+    coords = coords.set_index("state").reindex(codes)
+    return go.Scattergeo(
+        locationmode="USA-states",
+        lon=coords["longitude"].to_numpy(),
+        lat=coords["latitude"].to_numpy(),
+        text=list(codes),
+        mode="text",
+        textfont=dict(size=font_size, color="black", weight="bold"),
+        hoverinfo="skip",
+        showlegend=False,
+    )
+
+
+def choropleth_animation(table, names=None, customdata=None, hovertemplate=None, colorscale="Blues",
+                         zmin=None, zmax=None, colorbar_title=None, title=None, coords=None,
+                         label_size=12, date_format="%b %Y", frame_duration=300, transition=200,
+                         slider_font_size=20):
+    # table: one row per frame (DatetimeIndex) and one column per two-letter state
+    # code. The locations, hover names and geo layout are sent once with the base
+    # trace; every frame only carries the z vector of trace 0, plus the matching
+    # rows of `customdata` (dict of tables shaped like `table`) if given.
+    table = table.sort_index()
+    codes = list(table.columns)
+    z = table.to_numpy(dtype="float64")
+    extra = None
+    if customdata:
+        extra = np.stack([customdata[key].reindex(index=table.index, columns=codes).to_numpy()
+                          for key in customdata], axis=-1)
+
+    frame_names = [d.strftime("%Y-%m-%d") for d in pd.DatetimeIndex(table.index)]
+    frame_labels = [d.strftime(date_format) for d in pd.DatetimeIndex(table.index)]
+    zmin = np.nanmin(z) if zmin is None else zmin
+    zmax = np.nanmax(z) if zmax is None else zmax
+
+    fig = go.Figure(go.Choropleth(
+        locations=codes,
+        locationmode="USA-states",
+        z=z[0],
+        customdata=extra[0] if extra is not None else None,
+        text=list(names.reindex(codes)) if names is not None else None,
+        hovertemplate=hovertemplate,
+        colorscale=colorscale,
+        zmin=zmin,
+        zmax=zmax,
+        colorbar=dict(title=dict(text=colorbar_title, font=dict(size=14))),
+    ))
+    if coords is not None:
+        fig.add_trace(state_labels(coords, codes, label_size))
+
+    fig.frames = [go.Frame(
+        name=name,
+        data=[{"type": "choropleth", "z": z[i], **({"customdata": extra[i]} if extra is not None else {})}],
+        traces=[0],
+    ) for i, name in enumerate(frame_names)]
+
+    fig.update_layout(
+        geo_scope="usa",
+        geo=dict(lakecolor="white"),
+        title=dict(text=title, x=0.5, font=dict(size=23, color="black", weight="bold")),
+        width=1200,
+        height=800,
+        sliders=[dict(
+            active=0,
+            steps=slider_steps(frame_names, frame_labels, frame_duration, transition),
+            currentvalue=dict(prefix="Date: ", font=dict(size=slider_font_size)),
+            x=0.1, len=0.85
+        )],
+        updatemenus=play_buttons(frame_duration, transition),
+    )
+    return fig
@@ -0,0 +1,248 @@
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+import datasets
+import geography
+
+METRICS_VERSION = 3
+WINDOW_DAYS = 7
+PER_CAPITA = 100_000
+COUNTS = ["cases", "deaths"]
+SOURCES = ["us-states", "states_cords"]
+
+# Same shape as a datasets.DATASETS entry, so its filter helpers apply.
+SPEC = {"dates": ["date"], "states": ["state"], "entity": "state"}
+
+
+def cache_paths():
+    cache_dir = os.path.join(datasets.DATA_DIR, ".cache")
+    return os.path.join(cache_dir, "state_metrics.parquet"), os.path.join(cache_dir, "state_metrics.json")
+
+
+def state_population():
+    # Census population by state name, from the canonical state table; other
+    # entities of us-states.csv (Guam, ...) get no per-100k rates.
+    table = geography.load_table()
+    return pd.Series(table["population"].to_numpy(), index=table["name"])
+
+
+def daily_increments(cumulative, groups, starts):
+    # New counts from the running maximum of each state's cumulative count: a
+    # downward correction gives a zero day instead of a negative one, and the
+    # recovery after it is not counted a second time. Lifting every state above
+    # the previous ones keeps one global running maximum from crossing states.
+    lift = groups * (cumulative.max() + 1)
+    peak = np.maximum.accumulate(cumulative + lift) - lift
+    new = np.diff(peak, prepend=0.0)
+    new[starts] = peak[starts]
+    return new
+
+
+def rolling_mean(values, keys, complete, window=WINDOW_DAYS):
+    # Trailing mean over `window` calendar days; `keys` are day numbers that
+    # increase within a state and jump by more than a window between states, so
+    # missing days count as zero and windows never reach into another state.
+    totals = np.concatenate([[0.0], np.cumsum(values)])
+    lo = np.searchsorted(keys, keys - (window - 1), side="left")
+    means = (totals[1:] - totals[lo]) / window
+    means[~complete] = np.nan
+    return means
+
+
+def carried_rows(carry):
+    # The last days of each state from an earlier derive(): cumulative counts are
+    # set to the running maximum so far, new counts are the ones already derived.
+    rows = {"date": [], "state": [], "fips": []}
+    for col in COUNTS:
+        rows[col], rows[f"new_{col}"] = [], []
+    for state, entry in carry.items():
+        for k, day in enumerate(entry["days"]):
+            rows["date"].append(day)
+            rows["state"].append(state)
+            rows["fips"].append(entry["fips"])
+            for col in COUNTS:
+                rows[col].append(entry["peak"][col])
+                rows[f"new_{col}"].append(entry["new"][col][k])
+    rows = pd.DataFrame(rows)
+    rows["date"] = pd.to_datetime(rows["date"])
+    return rows
+
+
+def derive(df, population, carry=None):
+    # One sort by (state, date), then every metric of every state from the same
+    # contiguous arrays. With the `carry` of an earlier call only `df`'s rows are
+    # derived, continuing each state where that call stopped. Returns the metrics
+    # and the carry for the next call.
+    carry = carry or {}
+    rows = carried_rows(carry)
+    combined = pd.concat([rows, df[["date", "state", "fips", *COUNTS]].astype({"state": str})],
+                         ignore_index=True)
+    codes, names = pd.factorize(combined["state"], sort=True)
+    days = combined["date"].to_numpy().astype("datetime64[D]").astype("int64")
+    order = np.lexsort((days, codes))
+    codes, days = codes[order], days[order]
+    carried = order < len(rows)
+    boundary = np.r_[True, codes[1:] != codes[:-1]]
+    starts = np.flatnonzero(boundary)
+    ends = np.r_[starts[1:], len(codes)] - 1
+    groups = np.cumsum(boundary) - 1
+    keys = groups * (days.max() - days.min() + 2 * WINDOW_DAYS) + (days - days.min())
+    first_days = days[starts]
+    for k, state in enumerate(names[codes[starts]]):
+        if state in carry:
+            first_days[k] = np.datetime64(carry[state]["first"], "D").astype("int64")
+    complete = days - first_days[groups] >= WINDOW_DAYS - 1
+
+    states = names[codes]
+    per_capita = PER_CAPITA / pd.Series(states).map(population).to_numpy(dtype="float64")
+    fips = combined["fips"].to_numpy(dtype="int64")[order]
+    dates = days.astype("datetime64[D]")
+    out = {
+        "date": dates.astype("datetime64[ns]"),
+        "state": states,
+        "fips": fips,
+        "population": PER_CAPITA / per_capita,
+    }
+    # Each state's last WINDOW_DAYS - 1 days are all a later call needs.
+    tail = days > days[ends][groups] - (WINDOW_DAYS - 1)
+    next_carry = {state: {"fips": int(fips[end]), "first": str(dates[start]), "days": [], "peak": {}, "new": {}}
+                  for state, start, end in zip(names[codes[starts]], starts, ends)}
+    for state in next_carry:
+        if state in carry:
+            next_carry[state]["first"] = carry[state]["first"]
+    for row in np.flatnonzero(tail):
+        next_carry[states[row]]["days"].append(str(dates[row]))
+    for col in COUNTS:
+        cumulative = combined[col].to_numpy(dtype="float64")[order]
+        new = daily_increments(cumulative, groups, starts)
+        new[carried] = combined[f"new_{col}"].to_numpy(dtype="float64")[order][carried]
+        mean = rolling_mean(new, keys, complete)
+        out[col] = cumulative
+        out[f"new_{col}"] = new
+        out[f"new_{col}_7d"] = mean
+        out[f"{col}_per_100k"] = cumulative * per_capita
+        out[f"new_{col}_7d_per_100k"] = mean * per_capita
+        peaks = np.maximum.reduceat(cumulative, starts)
+        for state, peak in zip(next_carry, peaks):
+            next_carry[state]["peak"][col] = float(peak)
+            next_carry[state]["new"][col] = []
+        for row in np.flatnonzero(tail):
+            next_carry[states[row]]["new"][col].append(float(new[row]))
+
+    metrics = pd.DataFrame(out)[~carried].reset_index(drop=True)
+    metrics["state"] = geography.state_names(metrics["state"])
+    return metrics, next_carry
+
+
+def source_meta():
+    meta = {}
+    for name in SOURCES:
+        path = datasets.csv_path(name)
+        stat = os.stat(path)
+        meta[name] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+    return meta
+
+
+def read_meta(meta_file):
+    with open(meta_file, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def is_fresh(meta_file, sources=None):
+    # `sources` overrides the size and mtime of some sources, e.g. the ones
+    # us-states.csv had before ingest.py appended to it.
+    meta = read_meta(meta_file)
+    if meta.get("version") != METRICS_VERSION:
+        return False
+    touched = False
+    for name, stat in {**source_meta(), **(sources or {})}.items():
+        entry = meta["sources"].get(name)
+        if entry is None or entry["size"] != stat["size"]:
+            return False
+        if entry["mtime_ns"] != stat["mtime_ns"]:
+            # Touched but possibly unchanged: fall back to the content hash, which
+            # is not known after an ingest appended to the file.
+            if entry["sha256"] is None or entry["sha256"] != datasets.file_digest(datasets.csv_path(name)):
+                return False
+            entry["mtime_ns"] = stat["mtime_ns"]
+            touched = True
+    if touched:
+        datasets.write_meta(meta_file, meta)
+    return True
+
+
+def is_current(sources=None):
+    cache_dir, meta_file = cache_paths()
+    return (datasets.HAVE_PYARROW and os.path.exists(cache_dir) and os.path.exists(meta_file)
+            and is_fresh(meta_file, sources))
+
+
+def rebuild():
+    current = source_meta()
+    metrics, carry = derive(datasets.load(SOURCES[0]), state_population())
+    if not datasets.HAVE_PYARROW:
+        return metrics
+    cache_dir, meta_file = cache_paths()
+    tmp_dir = datasets.stage_dir(cache_dir)
+    metrics.to_parquet(datasets.part_path(tmp_dir, 0), index=False, row_group_size=datasets.ROW_GROUP_SIZE)
+    if is_current():
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        return metrics
+    datasets.replace_dir(tmp_dir, cache_dir)
+    for name, stat in current.items():
+        stat["sha256"] = datasets.file_digest(datasets.csv_path(name))
+    datasets.write_meta(meta_file, {"version": METRICS_VERSION, "sources": current, "rows": len(metrics),
+                                    "parts": 1, "carry": carry})
+    return metrics
+
+
+def extend(rows):
+    # Appends the metrics of rows just appended to us-states.csv as one more
+    # part, continuing from the carry of the cached ones. Only valid while
+    # is_current() held before the source grew; ingest.py checks that.
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    cache_dir, meta_file = cache_paths()
+    meta = read_meta(meta_file)
+    metrics, meta["carry"] = derive(rows, state_population(), meta["carry"])
+    schema = pq.read_schema(datasets.part_path(cache_dir, 0))
+    table = pa.Table.from_pandas(metrics, schema=schema, preserve_index=False)
+    pq.write_table(table, datasets.part_path(cache_dir, meta["parts"]))
+    stat = os.stat(datasets.csv_path(SOURCES[0]))
+    meta["sources"][SOURCES[0]] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": None}
+    meta["rows"] += len(metrics)
+    meta["parts"] += 1
+    datasets.write_meta(meta_file, meta)
+    return metrics
+
+
+def load_state_metrics(columns=None, states=None, start=None, end=None):
+    # Daily new counts, 7-day means and per-100k rates for every state, derived
+    # from us-states.csv once and cached in data/.cache/state_metrics.parquet
+    # until either source CSV changes other than by ingest.py appending to it.
+    if isinstance(states, str):
+        states = [states]
+    start = pd.Timestamp(start) if start is not None else None
+    end = pd.Timestamp(end) if end is not None else None
+    if is_current():
+        df = pd.read_parquet(cache_paths()[0], columns=columns,
+                             filters=datasets.parquet_filters(SPEC, states, start, end))
+        return df.reset_index(drop=True)
+
+    df = datasets.filter_frame(rebuild(), SPEC, states, start, end)
+    return df[columns] if columns is not None else df
+
+
+def weekly_totals(metrics, column="new_cases"):
+    # Week-ending-Sunday totals of a daily column, one column per state. Only
+    # weeks whose seven days are all in the data are kept: us-states.csv starts
+    # on a Tuesday and ends on a Thursday, and a partial week reads as a drop.
+    table = metrics.pivot(index="date", columns="state", values=column)
+    days = pd.Series(1, index=table.index).resample("W").sum()
+    totals = table.resample("W").sum(min_count=1)
+    return totals[days.reindex(totals.index, fill_value=0).to_numpy() == 7]
@@ -2,21 +2,14 @@ import pandas as pd
 import plotly.graph_objects as go
 import matplotlib.pyplot as plt
 import colorsys
+from datasets import load
+from geography import fifty_states
+from html_export import write_html
+from downsample import stride_rows
 
-df = pd.read_csv("../data/us_state_vaccinations.csv")
-df["date"] = pd.to_datetime(df["date"])
+df = load("us_state_vaccinations")
 
-us_states = [
-    "Alabama", "Alaska", "Arizona", "Arkansas", "California", "Colorado", "Connecticut",
-    "Delaware", "Florida", "Georgia", "Hawaii", "Idaho", "Illinois", "Indiana",
-    "Iowa", "Kansas", "Kentucky", "Louisiana", "Maine", "Maryland", "Massachusetts",
-    "Michigan", "Minnesota", "Mississippi", "Missouri", "Montana", "Nebraska",
-    "Nevada", "New Hampshire", "New Jersey", "New Mexico", "New York", "North Carolina",
-    "North Dakota", "Ohio", "Oklahoma", "Oregon", "Pennsylvania", "Rhode Island",
-    "South Carolina", "South Dakota", "Tennessee", "Texas", "Utah", "Vermont",
-    "Virginia", "Washington", "West Virginia", "Wisconsin", "Wyoming"
-]
-df = df[df["location"].isin(us_states)]
+df = df[fifty_states(df["location"])]
 
 metrics = [
     "people_fully_vaccinated_per_hundred",
@@ -29,8 +22,6 @@ metric_labels = {
     "total_boosters_per_hundred": "Total bootsters given"
 }
 
-states = sorted(df["location"].unique())
-
 def generate_50_distinct_colors():
     colors = []
     for i in range(50):
@@ -44,34 +35,38 @@ def generate_50_distinct_colors():
 
 colors = generate_50_distinct_colors()
 
+# One pivot for all metrics onto a shared daily grid: every trace gets its dates
+# from x0/dx instead of an array of its own, and the dropdown only swaps the y
+# column of each state in with a restyle.
+days = pd.date_range(df["date"].min(), df["date"].max(), freq="D")
+wide = df.pivot_table(index="date", columns="location", values=metrics, observed=True).reindex(days)
+# The cumulative per-hundred curves are smooth, so an evenly thinned grid with
+# about one point per horizontal pixel draws the same lines.
+rows, step = stride_rows(len(days), 1300)
+days, wide = days[rows], wide.iloc[rows]
+states = sorted(wide[metrics[0]].columns)
+
 fig = go.Figure()
 
-for metric_index, metric in enumerate(metrics):
-    for state_idx, state in enumerate(states):
-        state_df = df[df["location"] == state]
-        visible = (metric_index == 0)
-        fig.add_trace(go.Scatter(
-            x=state_df["date"],
-            y=state_df[metric],
-            mode="lines+markers",
-            name=state,
-            legendgroup=state,
-            showlegend=True if metric_index == 0 else False,
-            visible=visible,
-            line=dict(color=colors[state_idx], width=1),
-            marker=dict(color=colors[state_idx], size=2)
-        ))
+for state_idx, state in enumerate(states):
+    fig.add_trace(go.Scatter(
+        x0=days[0].strftime("%Y-%m-%d"),
+        dx=step * 24 * 60 * 60 * 1000,
+        y=wide[(metrics[0], state)].to_numpy(),
+        mode="lines+markers",
+        connectgaps=True,
+        name=state,
+        legendgroup=state,
+        line=dict(color=colors[state_idx], width=1),
+        marker=dict(color=colors[state_idx], size=2)
+    ))
 
 buttons = []
-num_states = len(states)
-for i, metric in enumerate(metrics):
-    visibility = [False] * (num_states * len(metrics))
-    for j in range(num_states):
-        visibility[i * num_states + j] = True
+for metric in metrics:
     buttons.append(dict(
         label=metric_labels[metric],
-        method="update",
-        args=[{"visible": visibility, "showlegend": True}, {}]
+        method="restyle",
+        args=[{"y": [wide[(metric, state)].to_numpy() for state in states]}]
     ))
 
 fig.update_layout(
@@ -91,6 +86,7 @@ fig.update_layout(
         font=dict(color="black", size=20, weight='bold')
     ),
     xaxis=dict(
+        type="date",
         range=[df["date"].min(), df["date"].max()],
         showgrid=True,
         gridcolor="lightgrey",
@@ -134,4 +130,4 @@ fig.update_layout(
     ),
 )
 
-fig.write_html("../plots/state_vaccination_trends.html")
+write_html(fig, "../plots/state_vaccination_trends.html")
@@ -1,9 +1,10 @@
-import pandas as pd
 import plotly.express as px
+from datasets import load
+from html_export import write_html
 
 no_order_states = ["Arkansas", "Iowa", "Nebraska", "North Dakota", "South Dakota", "Utah", "Wyoming"]
 
-df_states = pd.read_csv("../data/states_cords.csv")
+df_states = load("states_cords")
 
 df_states["stay_home_status_label"] = df_states["name"].apply(
     lambda x: "No statewide order" if x in no_order_states else "Issued stay-at-home order"
@@ -70,4 +71,4 @@ fig.update_layout(
 
 fig.update_traces(marker_line_color="#20405D", marker_line_width=1)
 
-fig.write_html("../plots/stay_home_orders_usa.html")
+write_html(fig, "../plots/stay_home_orders_usa.html")
@@ -1,25 +1,9 @@
-import pandas as pd
 import plotly.express as px
+from datasets import load
+from html_export import write_html
+from colleges import attach_college_info
 
-df_cases = pd.read_csv("../data/colleges.csv")      
-df_colleges = pd.read_csv("../data/colleges_cords.csv")
-
-df_cases["ipeds_id"] = df_cases["ipeds_id"].astype(str)
-df_colleges["UNITID"] = df_colleges["UNITID"].astype(str)
-
-coords_dict = df_colleges.set_index("UNITID")[["LATITUDE", "LONGITUDE", "STATE", "INSTNM", "STABBR"]].to_dict("index")
-
-def get_college_info(ipeds):
-    info = coords_dict.get(ipeds, {})
-    return pd.Series({
-        "LATITUDE": info.get("LATITUDE"),
-        "LONGITUDE": info.get("LONGITUDE"),
-        "STATE": info.get("STATE"),
-        "STABBR": info.get("STABBR"),
-        "INSTNM": info.get("INSTNM")
-    })
-
-df_cases = df_cases.join(df_cases["ipeds_id"].apply(get_college_info))
+df_cases = attach_college_info(load("colleges"))
 df_cases = df_cases.dropna(subset=["LATITUDE", "LONGITUDE"])
 
 fig = px.scatter_geo(
@@ -60,7 +44,7 @@ fig.update_layout(
     height = 800,
 )
 
-state_labels = df_cases.groupby("STABBR").agg({"LATITUDE": "mean", "LONGITUDE": "mean"}).reset_index()
+state_labels = df_cases.groupby("STABBR", observed=True).agg({"LATITUDE": "mean", "LONGITUDE": "mean"}).reset_index()
 state_labels.loc[state_labels["STABBR"] == "NY", "LATITUDE"] += 1.5
 
 fig.add_scattergeo(
@@ -73,5 +57,5 @@ fig.add_scattergeo(
     textfont=dict(color="#20405D", size=12, weight="bold")
 )
 
-fig.write_html("../plots/covid_cases_colleges_map.html")
+write_html(fig, "../plots/covid_cases_colleges_map.html")
 
@@ -1,22 +1,12 @@
-import pandas as pd
 import matplotlib.pyplot as plt
 import matplotlib.dates as mdates
+from datasets import load
+from geography import fifty_states
 
-df = pd.read_csv("../data/us_state_vaccinations.csv")
+df = load("us_state_vaccinations")
 
-us_states = [
-    "Alabama", "Alaska", "Arizona", "Arkansas", "California", "Colorado", "Connecticut", "Delaware",
-    "Florida", "Georgia", "Hawaii", "Idaho", "Illinois", "Indiana", "Iowa", "Kansas", "Kentucky",
-    "Louisiana", "Maine", "Maryland", "Massachusetts", "Michigan", "Minnesota", "Mississippi",
-    "Missouri", "Montana", "Nebraska", "Nevada", "New Hampshire", "New Jersey", "New Mexico",
-    "New York", "North Carolina", "North Dakota", "Ohio", "Oklahoma", "Oregon", "Pennsylvania",
-    "Rhode Island", "South Carolina", "South Dakota", "Tennessee", "Texas", "Utah", "Vermont",
-    "Virginia", "Washington", "West Virginia", "Wisconsin", "Wyoming"
-]
+df = df[fifty_states(df["location"])]
 
-df = df[df["location"].isin(us_states)]
-
-df["date"] = pd.to_datetime(df["date"])
 df["month"] = df["date"].dt.to_period("M").dt.to_timestamp()
 
 monthly_avg = df.groupby("month")[[
@@ -0,0 +1,182 @@
+import hashlib
+import json
+import os
+import re
+
+import numpy as np
+import pandas as pd
+from scipy.signal import find_peaks, peak_widths
+
+import datasets
+from alignment import align_daily
+
+SMOOTH_DAYS = 21
+# Relative to the series maximum, which is the Omicron peak for most series:
+# the US spring 2020 case wave stands out by only about 1% of it.
+PROMINENCE = 0.005
+MIN_GAP_DAYS = 75
+REL_HEIGHT = 0.85
+WAVES_VERSION = 1
+
+# Waves are named after the era their peak falls in; waves outside every era,
+# or a second wave within the same era, are numbered instead.
+ERAS = [
+    ("First wave", "2020-02-15", "2020-06-15", "Spring 2020"),
+    ("Summer 2020 wave", "2020-06-15", "2020-09-30", "Summer 2020"),
+    ("Second wave", "2020-10-01", "2021-03-31", "Winter-Spring 2020/2021"),
+    ("Alpha variant", "2021-04-01", "2021-05-31", "Spring 2021"),
+    ("Delta variant", "2021-06-01", "2021-11-15", "Summer 2021"),
+    ("Omicron variant", "2021-11-16", "2022-04-15", "Winter 2022"),
+    ("Omicron BA.5", "2022-04-16", "2022-10-15", "Summer 2022"),
+    ("Winter 2022/2023 wave", "2022-10-16", "2023-04-15", "Winter 2022/2023"),
+]
+ERA_DESCRIPTIONS = {label: description for label, _, _, description in ERAS}
+
+COLUMNS = ["dataset", "column", "entity", "wave", "label", "start", "peak", "end", "peak_value", "prominence"]
+
+
+def cache_paths(dataset, column):
+    # One table and meta file per dataset column, so concurrent builds working
+    # on different columns never rewrite each other's entries.
+    cache_dir = os.path.join(datasets.DATA_DIR, ".cache", "waves")
+    stem = re.sub(r"[^\w.-]+", "_", f"{dataset}.{column}")
+    return os.path.join(cache_dir, stem + ".csv"), os.path.join(cache_dir, stem + ".json")
+
+
+def params_digest(params):
+    return hashlib.sha256(json.dumps([WAVES_VERSION, params], sort_keys=True).encode()).hexdigest()
+
+
+def smooth(values, days):
+    # Centered moving average via a cumulative sum, shrinking at the edges.
+    half = days // 2
+    padded = np.concatenate([[0.0], np.cumsum(np.nan_to_num(values))])
+    counts = np.concatenate([[0], np.cumsum(np.isfinite(values))])
+    idx = np.arange(len(values))
+    lo, hi = np.maximum(idx - half, 0), np.minimum(idx + half + 1, len(values))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return (padded[hi] - padded[lo]) / (counts[hi] - counts[lo])
+
+
+def label_waves(peak_dates, prominences):
+    # The most prominent wave of each era gets its name.
+    labels = [None] * len(peak_dates)
+    for label, start, end, _ in ERAS:
+        inside = [k for k, d in enumerate(peak_dates)
+                  if pd.Timestamp(start) <= d <= pd.Timestamp(end) and labels[k] is None]
+        if inside:
+            labels[max(inside, key=lambda k: prominences[k])] = label
+    return [label or f"Wave {k + 1}" for k, label in enumerate(labels)]
+
+
+def detect_waves(dates, values, smooth_days=SMOOTH_DAYS, prominence=PROMINENCE, min_gap_days=MIN_GAP_DAYS,
+                 rel_height=REL_HEIGHT):
+    # dates: daily DatetimeIndex, values: matching array. Peaks are found on the
+    # smoothed curve and must stand out by `prominence` times its maximum; the
+    # wave runs between the points where the curve has come down rel_height of
+    # the way to its surrounding troughs. The reported peak is the maximum of
+    # the raw values within the wave.
+    values = np.asarray(values, dtype="float64")
+    smoothed = smooth(values, smooth_days)
+    filled = np.nan_to_num(smoothed)
+    top = np.nanmax(smoothed) if np.isfinite(smoothed).any() else 0
+    if top <= 0:
+        return pd.DataFrame(columns=COLUMNS[3:])
+    peaks, props = find_peaks(filled, prominence=prominence * top, distance=min_gap_days)
+    if len(peaks) == 0:
+        return pd.DataFrame(columns=COLUMNS[3:])
+    _, _, left, right = peak_widths(filled, peaks, rel_height=rel_height,
+                                    prominence_data=(props["prominences"], props["left_bases"],
+                                                     props["right_bases"]))
+    starts = np.floor(left).astype("int64")
+    ends = np.minimum(np.ceil(right).astype("int64"), len(values) - 1)
+    # Neighbouring waves meet at the trough between their peaks at the latest.
+    troughs = [p + int(np.argmin(filled[p:q])) for p, q in zip(peaks[:-1], peaks[1:])]
+    ends[:-1] = np.minimum(ends[:-1], troughs)
+    starts[1:] = np.maximum(starts[1:], troughs)
+
+    raw = np.where(np.isfinite(values), values, -np.inf)
+    raw_peaks = np.array([s + int(np.argmax(raw[s:e + 1])) for s, e in zip(starts, ends)])
+    return pd.DataFrame({
+        "wave": np.arange(1, len(peaks) + 1),
+        "label": label_waves(dates[raw_peaks], props["prominences"]),
+        "start": dates[starts],
+        "peak": dates[raw_peaks],
+        "end": dates[ends],
+        "peak_value": values[raw_peaks],
+        "prominence": props["prominences"],
+    })
+
+
+def compute_waves(dataset, column, entity_col, date_col, cumulative, params):
+    df = datasets.load(dataset, columns=[entity_col, date_col, column])
+    tables = []
+    for entity, group in df.groupby(entity_col, observed=True, sort=True):
+        series = group.set_index(date_col)[column].sort_index().astype("float64")
+        if cumulative:
+            series = series.diff().clip(lower=0)
+        series = series.dropna()
+        if series.empty:
+            continue
+        dates, (values,) = align_daily([series])
+        table = detect_waves(dates, values, **params)
+        table.insert(0, "entity", str(entity))
+        tables.append(table)
+    table = pd.concat(tables, ignore_index=True) if tables else pd.DataFrame(columns=COLUMNS[2:])
+    table.insert(0, "column", column)
+    table.insert(0, "dataset", dataset)
+    return table[COLUMNS]
+
+
+def read_cache(dataset, column):
+    table_file, meta_file = cache_paths(dataset, column)
+    if not (os.path.exists(table_file) and os.path.exists(meta_file)):
+        return None, None
+    with open(meta_file, encoding="utf-8") as f:
+        meta = json.load(f)
+    table = pd.read_csv(table_file, parse_dates=["start", "peak", "end"])
+    return table, meta
+
+
+def is_fresh(entry, source, digest):
+    if entry is None or entry.get("params") != digest:
+        return False
+    stat = os.stat(source)
+    if entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns:
+        return True
+    return entry["size"] == stat.st_size and entry["sha256"] == datasets.file_digest(source)
+
+
+def write_cache(dataset, column, waves, meta):
+    # The table goes first: a meta file only ever describes a table in place.
+    table_file, meta_file = cache_paths(dataset, column)
+    os.makedirs(os.path.dirname(table_file), exist_ok=True)
+    tmp_path = table_file + f".{os.getpid()}.tmp"
+    waves.to_csv(tmp_path, index=False, date_format="%Y-%m-%d")
+    os.replace(tmp_path, table_file)
+    datasets.write_meta(meta_file, meta)
+
+
+def wave_table(dataset, column, entity_col="Entity", date_col="Day", cumulative=False, **params):
+    # Waves of every entity of one dataset column, computed in one pass and
+    # cached in data/.cache/waves/ until the source CSV or the parameters change.
+    params = {"smooth_days": SMOOTH_DAYS, "prominence": PROMINENCE, "min_gap_days": MIN_GAP_DAYS,
+              "rel_height": REL_HEIGHT, **params}
+    digest = params_digest({**params, "entity_col": entity_col, "date_col": date_col, "cumulative": cumulative})
+    source = datasets.csv_path(dataset)
+    table, meta = read_cache(dataset, column)
+    # A column without any detected wave is recomputed rather than trusted.
+    if table is not None and len(table) and is_fresh(meta, source, digest):
+        return table
+
+    waves = compute_waves(dataset, column, entity_col, date_col, cumulative, params)
+    stat = os.stat(source)
+    write_cache(dataset, column, waves, {"params": digest, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns,
+                                         "sha256": datasets.file_digest(source)})
+    return waves
+
+
+def entity_waves(dataset, column, entity, **kwargs):
+    # One entity's waves indexed by label, e.g. waves.loc["Delta variant", "peak"].
+    table = wave_table(dataset, column, **kwargs)
+    return table[table["entity"] == entity].set_index("label")